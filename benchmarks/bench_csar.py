@@ -0,0 +1,119 @@
+""" Peak memory of get_csar_inputs on a large synthetic CSAR
+
+Usage: python -m benchmarks.bench_csar [size_mb]
+
+Builds a CSAR holding a small TOSCA template and a bundled file of
+`size_mb` (default 200) random bytes, then inspects it in a fresh
+process with the previous in-memory implementation and the current
+streaming one. Reports the peak RSS growth of each over the resident
+base64 input, sampled from /proc/self/statm.
+"""
+
+import base64
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+import ruamel.yaml as yaml
+
+from micado_eec.utils import get_adt_inputs, get_csar_inputs
+
+ADT = b"""\
+tosca_definitions_version: tosca_simple_yaml_1_2
+imports:
+  - micado_types.yaml
+topology_template:
+  inputs:
+    size:
+      description: size of the bundled file
+"""
+PAGE_SIZE = resource.getpagesize()
+
+
+def legacy_get_csar_inputs(b64_csar):
+    """get_csar_inputs as it was, decoding the whole CSAR in memory"""
+    file_content = base64.b64decode(b64_csar)
+    zip_file = zipfile.ZipFile(io.BytesIO(file_content))
+    params = []
+    for file in zip_file.namelist():
+        if not file.endswith(".yaml") or file.startswith("__"):
+            continue
+        params.extend(get_adt_inputs(yaml.safe_load(zip_file.open(file))))
+    return params
+
+
+VARIANTS = {"legacy": legacy_get_csar_inputs, "current": get_csar_inputs}
+
+
+def build_csar(path, size_mb):
+    archive = os.path.join(os.path.dirname(path), "bench.csar")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zip_file:
+        zip_file.writestr(
+            "TOSCA-Metadata/TOSCA.meta",
+            "TOSCA-Meta-File-Version: 1.0\nEntry-Definitions: adt.yaml\n",
+        )
+        zip_file.writestr("adt.yaml", ADT)
+        with zip_file.open("files/bundle.bin", "w", force_zip64=True) as bundle:
+            for _ in range(size_mb):
+                bundle.write(os.urandom(2**20))
+    with open(archive, "rb") as source, open(path, "wb") as target:
+        base64.encode(source, target)
+    os.remove(archive)
+
+
+def rss():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+def measure(variant, path):
+    with open(path) as file:
+        b64_csar = file.read()
+    baseline = rss()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], rss())
+            time.sleep(0.001)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    start = time.perf_counter()
+    params = VARIANTS[variant](b64_csar)
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    assert [param["key"] for param in params] == ["size"]
+    print(
+        f"{variant:<8} {len(b64_csar) / 2**20:>10.0f} "
+        f"{(peak[0] - baseline) / 2**20:>14.1f} {elapsed:>9.2f}"
+    )
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        measure(sys.argv[2], sys.argv[3])
+        return
+
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "bench.csar.b64")
+        build_csar(path, size_mb)
+        print(f"{'variant':<8} {'input (MB)':>10} {'peak RSS (MB)':>14} {'time (s)':>9}")
+        for variant in VARIANTS:
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_csar", "--child", variant, path],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+""" Redis round trips and latency of the submission status endpoints
+
+Usage: python -m benchmarks.bench_endpoints [requests]
+
+Polls a submission through the Flask test client, comparing the current
+handlers to the previous HGETALL + HGET implementation. Round trips are
+counted from the Redis server's command statistics.
+"""
+
+import statistics
+import sys
+import time
+import uuid
+
+from flask import jsonify
+
+from micado_eec.micado import app, r
+
+
+def legacy_get_submission(submission_id):
+    submission = r.hgetall(submission_id)
+    if not submission:
+        return jsonify({}), 404
+    return jsonify(
+        {
+            "status": r.hget(submission_id, "status"),
+            "details": r.hget(submission_id, "details"),
+            "onlyStatus": r.hget(submission_id, "only_status"),
+        }
+    )
+
+
+app.add_url_rule(
+    "/bench/legacy/<submission_id>", view_func=legacy_get_submission
+)
+
+
+def command_count():
+    stats = r.info("commandstats")
+    return sum(stat["calls"] for stat in stats.values())
+
+
+def poll(client, url, count):
+    latencies = []
+    calls = command_count()
+    for _ in range(count):
+        start = time.perf_counter()
+        rv = client.get(url)
+        latencies.append(time.perf_counter() - start)
+        assert rv.status_code == 200
+    # command_count() itself issues one INFO command
+    trips = (command_count() - calls - 1) / count
+    return trips, latencies
+
+
+def report(name, trips, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:<10} {trips:>6.1f} {p50:>10.3f} {p99:>10.3f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    submission_id = f"bench-{uuid.uuid4()}"
+    r.hmset(
+        submission_id,
+        {
+            "status": 1,
+            "details": "x" * 2048,
+            "only_status": True,
+            "submit_time": time.time(),
+        },
+    )
+    app.config["TESTING"] = True
+    try:
+        with app.test_client() as client:
+            print(f"{'handler':<10} {'trips':>6} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+            report("legacy", *poll(client, f"/bench/legacy/{submission_id}", count))
+            report(
+                "current",
+                *poll(client, f"/micado_eec/submissions/{submission_id}", count),
+            )
+    finally:
+        r.delete(submission_id)
+
+
+if __name__ == "__main__":
+    main()
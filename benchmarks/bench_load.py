@@ -0,0 +1,223 @@
+""" Submit, poll and delete cycles through the EEC API on the fake launcher
+
+Usage: python -m benchmarks.bench_load [cycles] [workers] [clients]
+
+Starts `workers` processes, each importing the Flask app like a gunicorn
+worker, and drives `cycles` submissions through each from `clients`
+threads: submit, poll until running, delete, poll until aborted. MiCADO
+nodes come from the in-process fake launcher, whose latency and failure
+rate are set with EEC_FAKE_CREATE_SECONDS, EEC_FAKE_DESTROY_SECONDS and
+EEC_FAKE_FAILURE_RATE. Needs the Redis at host `redis`.
+
+Reports, per worker and in total, the cycle throughput, p50/p99 latency
+of each call, the peak thread count and the peak RSS of the worker.
+"""
+
+import base64
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL = 0.01
+CYCLE_TIMEOUT = 60
+
+ADT = b"""\
+tosca_definitions_version: tosca_simple_yaml_1_2
+imports:
+- micado_types.yaml
+topology_template:
+  inputs:
+    replicas:
+      default: 1
+  node_templates:
+    stressng:
+      type: tosca.nodes.MiCADO.Container.Application.Docker.Deployment
+      properties:
+        image: lorel/docker-stress-ng
+"""
+
+
+def configure(spec_path):
+    os.environ["MICADO_CLOUD_LAUNCHER"] = "fake"
+    os.environ["MICADO_SPEC"] = spec_path
+    os.environ.setdefault("EEC_MAX_PROVISIONING", "1000")
+
+
+def submission(thread_id):
+    artefact = {
+        "emgwamId": thread_id,
+        "downloadUrl": "adt.yaml",
+        "downloadUrl_content": base64.b64encode(ADT).decode(),
+    }
+    inouts = {"parameters": [{"key": "replicas", "value": "2"}]}
+    return {
+        "artefact_data": (io.BytesIO(json.dumps(artefact).encode()), "artefact_data"),
+        "inouts": (io.BytesIO(json.dumps(inouts).encode()), "inouts"),
+    }
+
+
+class Cycles:
+    """Runs submission cycles on one test client, timing every call"""
+
+    def __init__(self, app, latencies, peak):
+        self.client = app.test_client()
+        self.latencies = latencies
+        self.peak = peak
+
+    def call(self, name, method, url, **kwargs):
+        start = time.perf_counter()
+        rv = getattr(self.client, method)(url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        self.peak["threads"] = max(self.peak["threads"], threading.active_count())
+        return rv
+
+    def poll(self, url, done):
+        deadline = time.time() + CYCLE_TIMEOUT
+        while time.time() < deadline:
+            rv = self.call("poll", "get", url)
+            if rv.status_code == 404 or done(rv.json):
+                return rv
+            time.sleep(POLL_INTERVAL)
+        raise TimeoutError(url)
+
+    def run(self, count):
+        from micado_eec.handle_micado import STATUS_ERROR, STATUS_RUNNING
+
+        errors = 0
+        for _ in range(count):
+            thread_id = f"bench-{uuid.uuid4()}"
+            url = f"/micado_eec/submissions/{thread_id}"
+            rv = self.call(
+                "submit",
+                "post",
+                "/micado_eec/submissions",
+                data=submission(thread_id),
+                content_type="multipart/form-data",
+            )
+            assert rv.status_code == 200, rv.get_data(as_text=True)
+            rv = self.poll(
+                url, lambda body: int(body["status"]) in (STATUS_RUNNING, STATUS_ERROR)
+            )
+            failed = int(rv.json["status"]) == STATUS_ERROR
+            self.call("delete", "delete", url)
+            self.poll(url, lambda body: int(body["status"]) != STATUS_RUNNING)
+            self.cleanup(thread_id, wait=not failed)
+            errors += failed
+        return errors
+
+    @staticmethod
+    def cleanup(thread_id, wait):
+        """Waits for the node to be destroyed, then drops the submission"""
+        from micado_eec.handle_micado import (
+            events_key,
+            r,
+            registry,
+            STATUS_INFRA_REMOVED,
+            STATUS_INFRA_REMOVE_ERROR,
+        )
+
+        deadline = time.time() + CYCLE_TIMEOUT
+        while wait and time.time() < deadline:
+            detail = r.hget(thread_id, "status_detail")
+            if detail in (STATUS_INFRA_REMOVED, STATUS_INFRA_REMOVE_ERROR):
+                break
+            time.sleep(POLL_INTERVAL)
+        r.delete(thread_id, events_key(thread_id))
+        registry.remove(thread_id)
+
+
+def worker(count, clients):
+    from micado_eec.micado import app
+
+    app.config["TESTING"] = True
+    latencies = defaultdict(list)
+    peak = {"threads": threading.active_count()}
+    per_client = [count // clients + (i < count % clients) for i in range(clients)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        errors = sum(
+            executor.map(lambda n: Cycles(app, latencies, peak).run(n), per_client)
+        )
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "pid": os.getpid(),
+        "cycles": count,
+        "errors": errors,
+        "elapsed": elapsed,
+        "latencies": dict(latencies),
+        "threads": peak["threads"],
+        "rss_mib": rss,
+    }
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)]
+
+
+def report(name, result, elapsed):
+    latencies = result["latencies"]
+    columns = [
+        f"{name:<8}",
+        f"{result['cycles']:>7}",
+        f"{result['errors']:>6}",
+        f"{result['cycles'] / elapsed:>8.1f}",
+    ]
+    for call in ("submit", "poll", "delete"):
+        columns.append(f"{statistics.median(latencies[call]) * 1000:>10.2f}")
+        columns.append(f"{percentile(latencies[call], 0.99) * 1000:>10.2f}")
+    columns += [f"{result['threads']:>7}", f"{result['rss_mib']:>8.1f}"]
+    print(" ".join(columns))
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    clients = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml") as spec:
+        spec.write("properties: {flavor: fake}\n")
+        spec.flush()
+        configure(spec.name)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers) as processes:
+            results = processes.starmap(worker, [(cycles, clients)] * workers)
+
+    print(
+        f"{'worker':<8} {'cycles':>7} {'errors':>6} {'cycles/s':>8}"
+        + "".join(
+            f" {call + ' p50':>10} {call + ' p99':>10}"
+            for call in ("submit", "poll", "delete")
+        )
+        + f" {'threads':>7} {'rss MiB':>8}"
+    )
+    total = {"cycles": 0, "errors": 0, "latencies": defaultdict(list)}
+    for result in results:
+        report(str(result["pid"]), result, result["elapsed"])
+        total["cycles"] += result["cycles"]
+        total["errors"] += result["errors"]
+        for call, values in result["latencies"].items():
+            total["latencies"][call] += values
+    total["threads"] = max(result["threads"] for result in results)
+    total["rss_mib"] = max(result["rss_mib"] for result in results)
+    # workers run side by side, so the total is over the slowest of them
+    report("total", total, max(result["elapsed"] for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+""" Parameter validation and secret resolution at 10, 100 and 1000 parameters
+
+Usage: python -m benchmarks.bench_params [repeats]
+
+Needs the Redis at host `redis`, where one throwaway submission hash per
+size is written and removed again. No parameter is a secret, so only
+the matching of parameters against their definitions is measured; the
+`__init__` column is the cost of building a handler with its indexes.
+"""
+
+import sys
+import time
+
+from micado_eec.handle_micado import HandleMicado, events_key, r, registry
+
+SIZES = (10, 100, 1000)
+
+
+def artefact(count):
+    definitions = [
+        {
+            "key": f"param_{i}",
+            "description": f"parameter {i}",
+            "required": True,
+            "type": "string",
+            "default": "",
+        }
+        for i in range(count)
+    ]
+    inouts = {
+        "parameters": [{"key": f"param_{i}", "value": f"v{i}"} for i in range(count)],
+        "free_inputs": [{"id": f"input_{i}"} for i in range(count)],
+    }
+    return definitions, inouts
+
+
+def load_params(definitions, inouts):
+    """_load_params and _is_valid_param as they were, without set_status"""
+
+    def is_valid_param(key_to_check):
+        available = {
+            value
+            for element in definitions
+            for value in element.values()
+            if value == key_to_check
+        }
+        return len(available) > 0
+
+    parameters = {
+        element["key"]: element["value"]
+        for element in inouts.get("parameters", [])
+        if is_valid_param(element["key"])
+    }
+    for name, value in parameters.items():
+        for definition in definitions:
+            if name != definition["key"]:
+                continue
+            if definition["type"] == "secret":
+                parameters[name] = value
+    return parameters
+
+
+def check_inputs(inouts):
+    """_is_valid_input as it was, over every free input"""
+    for input_to_check in inouts["free_inputs"]:
+        available = [
+            _input
+            for _input in inouts.get("free_inputs", [])
+            if _input["id"] == input_to_check["id"]
+        ]
+        assert len(available) == 1
+
+
+def build(definitions, inouts):
+    thread_id = f"bench-params-{len(definitions)}"
+    handler = HandleMicado(
+        thread_id, thread_id, inouts=inouts, parameters=definitions
+    )
+    handler.set_status = lambda **kwargs: None
+    return handler
+
+
+def check_inputs_indexed(handler):
+    for input_to_check in handler.inouts["free_inputs"]:
+        assert handler._is_valid_input(input_to_check)
+
+
+def timed(repeats, func, *args):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'params':>7} {'before':>12} {'__init__':>10} {'after':>10}")
+    for count in SIZES:
+        definitions, inouts = artefact(count)
+        handler = build(definitions, inouts)
+        try:
+            before = timed(repeats, load_params, definitions, inouts)
+            before += timed(repeats, check_inputs, inouts)
+            index = timed(repeats, build, definitions, inouts)
+            after = timed(repeats, handler._load_params)
+            after += timed(repeats, check_inputs_indexed, handler)
+        finally:
+            r.delete(handler.threadID, events_key(handler.threadID))
+            registry.remove(handler.threadID)
+        print(
+            f"{count:>7} {before * 1e3:>9.3f} ms {index * 1e3:>7.3f} ms"
+            f" {after * 1e3:>7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+""" Startup recovery with 10k submissions: KEYS scan vs. registry index
+
+Usage: python -m benchmarks.bench_registry [submissions]
+
+Uses database 15 of the Redis at $REDIS_HOST (default: redis), which is
+flushed before and after the run.
+"""
+
+import os
+import sys
+import time
+
+import redis
+
+from micado_eec.registry import Registry
+
+HOST = os.environ.get("REDIS_HOST", "redis")
+DB = int(os.environ.get("BENCH_REDIS_DB", 15))
+
+
+def populate(client, count):
+    now = time.time()
+    pipe = client.pipeline(transaction=False)
+    for i in range(count):
+        thread_id = f"bench-{i}"
+        pipe.hset(thread_id, "submit_time", now)
+        pipe.hset(thread_id, "micado_id", f"micado-{i}")
+        if i % 10:
+            pipe.hset(thread_id, "last_app_refresh", now - i % 60)
+    pipe.execute()
+
+
+def scan_keys(client, before):
+    """The recovery loop as it was: KEYS, then two HGETs per key"""
+    stale = []
+    for thread_id in client.keys():
+        client.hget(thread_id, "micado_id")
+        updated = client.hget(thread_id, "last_app_refresh")
+        if updated and float(updated) < before:
+            stale.append(thread_id)
+    return stale
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    client = redis.StrictRedis(HOST, db=DB, decode_responses=True)
+    client.flushdb()
+    try:
+        populate(client, count)
+        registry = Registry(client)
+
+        before = time.time() - 30
+        scan_time, scanned = timed(scan_keys, client, before)
+        migrate_time, _ = timed(registry.migrate)
+        query_time, queried = timed(registry.stale, before)
+        assert sorted(scanned) == sorted(queried)
+
+        print(f"submissions:        {count}")
+        print(f"stale found:        {len(queried)}")
+        print(f"KEYS + HGET scan:   {scan_time * 1000:9.1f} ms")
+        print(f"one-off migration:  {migrate_time * 1000:9.1f} ms")
+        print(f"registry query:     {query_time * 1000:9.1f} ms")
+    finally:
+        client.flushdb()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+""" Per-secret decryption cost: key imported per call vs. cached cipher
+
+Usage: python -m benchmarks.bench_secrets [secrets] [key bits]
+
+Generates a throwaway EEC private key in a temporary directory.
+"""
+
+import base64
+import os
+import sys
+import tempfile
+import time
+from base64 import b16decode, b64decode
+
+from Crypto.Cipher import PKCS1_v1_5 as Cipher_PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+from micado_eec import utils
+
+
+def decrypt_ciphertext(ciphertext):
+    """decrypt_ciphertext as it was: the key is imported for every secret"""
+    decode_data = b64decode(ciphertext)
+
+    if len(decode_data) == 127:
+        hex_fixed = '00' + decode_data.hex()
+        decode_data = b16decode(hex_fixed.upper())
+
+    with open(utils.EEC_PRIV_KEY) as privkey:
+        other_private_key = RSA.importKey(b64decode(privkey.read()))
+
+    cipher = Cipher_PKCS1_v1_5.new(other_private_key)
+    return cipher.decrypt(decode_data, None).decode()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bits = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+
+    key = RSA.generate(bits)
+    encrypt = Cipher_PKCS1_v1_5.new(key.publickey()).encrypt
+    secrets = [f"secret-{i}" for i in range(count)]
+    ciphertexts = [
+        base64.b64encode(encrypt(secret.encode())).decode() for secret in secrets
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        utils.EEC_PRIV_KEY = os.path.join(directory, "eec.pem")
+        with open(utils.EEC_PRIV_KEY, "wb") as privkey:
+            privkey.write(base64.b64encode(key.export_key()))
+
+        before, plain = timed(lambda: [decrypt_ciphertext(c) for c in ciphertexts])
+        cold, _ = timed(utils.decrypt_many, ciphertexts[:1])
+        after, batched = timed(utils.decrypt_many, ciphertexts)
+    assert plain == batched == secrets
+
+    print(f"{count} secrets, {bits}-bit key")
+    print(f"  import per secret: {before * 1e3 / count:8.3f} ms/secret")
+    print(f"  first call (import): {cold * 1e3:6.3f} ms")
+    print(f"  cached cipher:     {after * 1e3 / count:8.3f} ms/secret")
+    print(f"  speed-up:          {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+""" Time and peak memory of the utils functions on every request path
+
+Usage: python -m benchmarks.bench_utils [--save] [--baseline PATH] [--only NAME]
+                                        [--tolerance 0.5] [--memory-tolerance 0.1]
+
+Runs base64_to_yaml, get_adt_inputs, is_valid_adt and file_to_json on
+generated ADTs of 10 to 5000 inputs, get_csar_inputs on generated CSARs
+of 1 KB to 50 MB, and decrypt_ciphertext with a throwaway 2048-bit key.
+
+Each case reports the best time per call, out of several samples of as
+many calls as take 0.2 s, and the peak of memory allocated during one
+call, traced with tracemalloc in a separate run. Results are compared
+with the stored baseline, and the exit status is 1 if any case got
+slower by more than `tolerance` or used more memory by more than
+`memory-tolerance`, as fractions of the baseline. `--save` stores the
+results as the new baseline instead. Timings depend on the machine, so
+save a baseline on the one that compares against it.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+import zipfile
+
+from Crypto.Cipher import PKCS1_v1_5 as Cipher_PKCS1_v1_5
+from Crypto.PublicKey import RSA
+from werkzeug.datastructures import FileStorage
+
+from micado_eec import utils
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline_utils.json")
+INPUT_COUNTS = (10, 100, 1000, 5000)
+CSAR_SIZES = (
+    ("1KB", 2**10),
+    ("1MB", 2**20),
+    ("10MB", 10 * 2**20),
+    ("50MB", 50 * 2**20),
+)
+REPEATS = 5
+
+
+def adt(inputs):
+    lines = [
+        "tosca_definitions_version: tosca_simple_yaml_1_2",
+        "imports:",
+        "  - micado_types.yaml",
+        "topology_template:",
+        "  inputs:",
+    ]
+    for i in range(inputs):
+        lines += [
+            f"    input_{i}:",
+            "      type: string",
+            f"      description: input {i} of the generated ADT",
+            f"      default: value_{i}",
+        ]
+    lines += [
+        "  node_templates:",
+        "    app:",
+        "      type: tosca.nodes.MiCADO.Container.Application.Docker.Deployment",
+        "      properties:",
+        "        image: busybox",
+    ]
+    return "\n".join(lines).encode() + b"\n"
+
+
+def csar(size, inputs=100):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zip_file:
+        zip_file.writestr(
+            utils.TOSCA_META,
+            "TOSCA-Meta-File-Version: 1.0\nEntry-Definitions: adt.yaml\n",
+        )
+        zip_file.writestr("adt.yaml", adt(inputs))
+        zip_file.writestr("files/bundle.bin", os.urandom(size))
+    return base64.b64encode(archive.getvalue()).decode()
+
+
+def adt_cases():
+    for inputs in INPUT_COUNTS:
+        raw = adt(inputs)
+        b64_adt = base64.b64encode(raw).decode()
+        parsed = utils.base64_to_yaml(b64_adt)
+        artefact = json.dumps(
+            {"downloadUrl": "adt.yaml", "downloadUrl_content": b64_adt}
+        ).encode()
+        label = f"{inputs} inputs"
+
+        yield "base64_to_yaml", label, lambda b64_adt=b64_adt: utils.base64_to_yaml(
+            b64_adt
+        )
+        yield "get_adt_inputs", label, lambda adt=parsed: utils.get_adt_inputs(adt)
+        yield "is_valid_adt", label, lambda adt=parsed: utils.is_valid_adt(adt)
+        yield "file_to_json", label, lambda data=artefact: utils.file_to_json(
+            FileStorage(io.BytesIO(data))
+        )
+
+
+def csar_cases():
+    for label, size in CSAR_SIZES:
+        b64_csar = csar(size)
+        yield "get_csar_inputs", label, lambda b64_csar=b64_csar: (
+            utils.get_csar_inputs(b64_csar)
+        )
+
+
+def secret_cases(directory):
+    key = RSA.generate(2048)
+    utils.EEC_PRIV_KEY = os.path.join(directory, "eec.pem")
+    with open(utils.EEC_PRIV_KEY, "wb") as privkey:
+        privkey.write(base64.b64encode(key.export_key()))
+    encrypt = Cipher_PKCS1_v1_5.new(key.publickey()).encrypt
+    ciphertext = base64.b64encode(encrypt(b"secret")).decode()
+    yield "decrypt_ciphertext", "2048 bit", lambda: utils.decrypt_ciphertext(
+        ciphertext
+    )
+
+
+def measure(call):
+    timer = timeit.Timer(call)
+    # calls per sample, enough for a sample to take 0.2 s or more
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(REPEATS, number)) / number
+
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def compare(result, baseline, tolerances):
+    """Returns the ratios to the baseline and whether either is too high"""
+    if not baseline:
+        return "", False
+    fields = ("seconds", "peak_bytes")
+    ratios = [
+        result[field] / baseline[field] if baseline[field] else 1 for field in fields
+    ]
+    regressed = any(
+        ratio > 1 + tolerance for ratio, tolerance in zip(ratios, tolerances)
+    )
+    flag = "  REGRESSION" if regressed else ""
+    return f"{ratios[0]:>7.2f}x {ratios[1]:>7.2f}x{flag}", regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.1)
+    parser.add_argument("--only", help="run only the cases of this function")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    tolerances = (args.tolerance, args.memory_tolerance)
+    results = {}
+    regressions = 0
+    print(f"{'case':<36} {'time (ms)':>10} {'peak (KiB)':>11} {'time':>8} {'peak':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for cases in (adt_cases, csar_cases, lambda: secret_cases(directory)):
+            for name, label, call in cases():
+                if args.only and name != args.only:
+                    continue
+                case = f"{name} [{label}]"
+                results[case] = result = measure(call)
+                ratios, regressed = compare(result, baseline.get(case), tolerances)
+                regressions += regressed
+                print(
+                    f"{case:<36} {result['seconds'] * 1000:>10.4f} "
+                    f"{result['peak_bytes'] / 1024:>11.1f} {ratios}"
+                )
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{regressions} case(s) regressed beyond tolerance")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+""" YAML loading: ruamel.yaml in pure Python vs. libyaml through PyYAML
+
+Usage: python -m benchmarks.bench_yaml [repeats]
+
+Parses tests/scripts/adt.yaml and generated ADTs of 10 to 5000 inputs
+with both parsers of micado_eec.yaml_loader, checking that they build
+identical data. Needs PyYAML with its libyaml extension.
+"""
+
+import os
+import sys
+import timeit
+
+import ruamel.yaml as yaml
+
+from micado_eec import yaml_loader
+from benchmarks.bench_utils import adt, INPUT_COUNTS
+
+TEST_ADT = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "scripts", "adt.yaml"
+)
+
+
+def parsers():
+    from micado_eec import _libyaml
+
+    return {"pure": yaml.safe_load, "libyaml": _libyaml.load}
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    if yaml_loader.PARSER != "libyaml":
+        sys.exit("libyaml is not available, install PyYAML with its C extension")
+
+    with open(TEST_ADT) as file:
+        documents = [("adt.yaml", file.read())]
+    documents += [(f"{inputs} inputs", adt(inputs).decode()) for inputs in INPUT_COUNTS]
+
+    load = parsers()
+    print(
+        f"{'document':<12} {'KiB':>7} {'pure (ms)':>10} "
+        f"{'libyaml (ms)':>13} {'speedup':>8}"
+    )
+    for name, document in documents:
+        assert load["pure"](document) == load["libyaml"](document), name
+        seconds = {
+            parser: min(timeit.repeat(lambda: func(document), number=1, repeat=repeats))
+            for parser, func in load.items()
+        }
+        print(
+            f"{name:<12} {len(document) / 1024:>7.1f} {seconds['pure'] * 1000:>10.2f} "
+            f"{seconds['libyaml'] * 1000:>13.2f} "
+            f"{seconds['pure'] / seconds['libyaml']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""YAML 1.2 loading with libyaml, through the C extension of PyYAML
+
+Imported by yaml_loader, and only importable where PyYAML is installed
+with libyaml. Documents load to the same Python objects as with
+`ruamel.yaml.safe_load`.
+"""
+
+import datetime
+import re
+
+import yaml
+from yaml.cyaml import CParser
+
+YAMLError = yaml.YAMLError
+
+
+class Yaml12Resolver(yaml.resolver.BaseResolver):
+    """Resolves plain scalars by the YAML 1.2 rules of ruamel.yaml
+
+    PyYAML follows YAML 1.1, where e.g. `yes` is a bool and `010`
+    an octal int, but ruamel.yaml.safe_load follows YAML 1.2.
+    """
+
+
+# tag, pattern and possible first characters of each implicit type
+IMPLICIT_TYPES = [
+    (
+        "tag:yaml.org,2002:bool",
+        r"^(?:true|True|TRUE|false|False|FALSE)$",
+        "tTfF",
+    ),
+    (
+        "tag:yaml.org,2002:float",
+        r"""^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+        |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+        |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""",
+        "-+0123456789.",
+    ),
+    (
+        "tag:yaml.org,2002:int",
+        r"""^(?:[-+]?0b[0-1_]+
+        |[-+]?0o?[0-7_]+
+        |[-+]?[0-9_]+
+        |[-+]?0x[0-9a-fA-F_]+)$""",
+        "-+0123456789",
+    ),
+    ("tag:yaml.org,2002:merge", r"^(?:<<)$", "<"),
+    ("tag:yaml.org,2002:null", r"^(?:~|null|Null|NULL|)$", ["~", "n", "N", ""]),
+    (
+        "tag:yaml.org,2002:timestamp",
+        r"""^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+        |[0-9][0-9][0-9][0-9]-[0-9][0-9]?-[0-9][0-9]?
+        (?:[Tt]|[ \t]+)[0-9][0-9]?
+        :[0-9][0-9]:[0-9][0-9](?:\.[0-9]*)?
+        (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$""",
+        "0123456789",
+    ),
+]
+for tag, pattern, first in IMPLICIT_TYPES:
+    Yaml12Resolver.add_implicit_resolver(tag, re.compile(pattern, re.X), list(first))
+
+
+class Yaml12Constructor(yaml.constructor.SafeConstructor):
+    """Builds the same Python objects as ruamel.yaml.safe_load"""
+
+    def construct_mapping(self, node, deep=False):
+        keys = set()
+        for key_node, _ in node.value:
+            if key_node.tag == "tag:yaml.org,2002:merge":
+                continue
+            key = self.construct_object(key_node, deep=True)
+            if key in keys:
+                raise yaml.constructor.ConstructorError(
+                    "while constructing a mapping",
+                    node.start_mark,
+                    f"found duplicate key {key!r}",
+                    key_node.start_mark,
+                )
+            keys.add(key)
+        return super().construct_mapping(node, deep=deep)
+
+    def construct_yaml_int(self, node):
+        value = self.construct_scalar(node).replace("_", "")
+        sign = -1 if value.startswith("-") else 1
+        value = value.lstrip("-+")
+        for prefix, base in (("0b", 2), ("0o", 8), ("0x", 16)):
+            if value.startswith(prefix):
+                return sign * int(value[2:], base)
+        return sign * int(value)
+
+    def construct_yaml_timestamp(self, node):
+        value = super().construct_yaml_timestamp(node)
+        if isinstance(value, datetime.datetime) and value.tzinfo:
+            value = (value - value.utcoffset()).replace(tzinfo=None)
+        return value
+
+
+Yaml12Constructor.add_constructor(
+    "tag:yaml.org,2002:int", Yaml12Constructor.construct_yaml_int
+)
+Yaml12Constructor.add_constructor(
+    "tag:yaml.org,2002:timestamp", Yaml12Constructor.construct_yaml_timestamp
+)
+
+
+class Loader(CParser, Yaml12Constructor, Yaml12Resolver):
+    def __init__(self, stream):
+        CParser.__init__(self, stream)
+        Yaml12Constructor.__init__(self)
+        Yaml12Resolver.__init__(self)
+
+
+def load(stream):
+    """Loads YAML 1.2 from a string or file
+
+    Raises:
+        yaml.YAMLError: if the document is not valid YAML
+    """
+    return yaml.load(stream, Loader=Loader)
@@ -0,0 +1,164 @@
+import os
+import time
+
+from .lease import LEASE_PREFIX
+
+QUEUE_PREFIX = "eec:queue:"
+ACTIVE = f"{QUEUE_PREFIX}active"
+ENQUEUED = f"{QUEUE_PREFIX}enqueued"
+CLOUDS = f"{QUEUE_PREFIX}clouds"
+QUEUE_STATS = f"{QUEUE_PREFIX}stats"
+
+MAX_PROVISIONING = int(os.environ.get("EEC_MAX_PROVISIONING", 10))
+MAX_PROVISIONING_PER_CLOUD = int(
+    os.environ.get("EEC_MAX_PROVISIONING_PER_CLOUD", MAX_PROVISIONING)
+)
+SLOT_TIMEOUT = int(os.environ.get("EEC_PROVISIONING_SLOT_TIMEOUT", 1800))
+PRIORITY_STEP = int(os.environ.get("EEC_QUEUE_PRIORITY_STEP", 86400))
+
+# Queues a submission if it is not already, frees slots whose holder is
+# gone, then moves the submission from the head of its cloud's queue to
+# the active set if both caps allow. Returns the time it was queued.
+# Leases are read by key prefix, so this assumes a single Redis node.
+_ADMIT = """
+local id, cloud, lease_prefix = ARGV[1], ARGV[2], ARGV[8]
+redis.call("zadd", KEYS[1], "NX", ARGV[3], id)
+redis.call("hsetnx", KEYS[3], id, ARGV[4])
+redis.call("sadd", KEYS[4], cloud)
+redis.call("zremrangebyscore", KEYS[2], "-inf", ARGV[7])
+
+local in_cloud = 0
+for _, slot in ipairs(redis.call("zrange", KEYS[2], 0, -1)) do
+    local sep = string.find(slot, "|", 1, true)
+    if redis.call("exists", lease_prefix .. string.sub(slot, sep + 1)) == 0 then
+        redis.call("zrem", KEYS[2], slot)
+    elseif string.sub(slot, 1, sep - 1) == cloud then
+        in_cloud = in_cloud + 1
+    end
+end
+
+while true do
+    local head = redis.call("zrange", KEYS[1], 0, 0)[1]
+    if head == id then
+        break
+    end
+    if redis.call("exists", lease_prefix .. head) == 1 then
+        return false
+    end
+    redis.call("zrem", KEYS[1], head)
+    redis.call("hdel", KEYS[3], head)
+end
+
+if redis.call("zcard", KEYS[2]) >= tonumber(ARGV[5])
+        or in_cloud >= tonumber(ARGV[6]) then
+    return false
+end
+redis.call("zrem", KEYS[1], id)
+redis.call("zadd", KEYS[2], ARGV[4], cloud .. "|" .. id)
+local enqueued = redis.call("hget", KEYS[3], id)
+redis.call("hdel", KEYS[3], id)
+return enqueued
+"""
+
+
+def waiting_key(cloud):
+    return f"{QUEUE_PREFIX}waiting:{cloud}"
+
+
+class AdmissionQueue:
+    """Limits how many MiCADO nodes are provisioned at once
+
+    Submissions queue per cloud in a sorted set, ordered by the time they
+    were queued, less `priority_step` seconds per step of priority. Only
+    the head of a queue may take a slot in the active set, and only while
+    fewer than `max_active` nodes are provisioning in total and fewer than
+    `max_per_cloud` on its cloud.
+
+    Queued submissions whose lease has expired are dropped, and slots are
+    freed when their holder loses its lease or after `slot_timeout`.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        cloud,
+        max_active=MAX_PROVISIONING,
+        max_per_cloud=MAX_PROVISIONING_PER_CLOUD,
+        slot_timeout=SLOT_TIMEOUT,
+        priority_step=PRIORITY_STEP,
+    ):
+        self._redis = redis_client
+        self.cloud = cloud
+        self.max_active = max_active
+        self.max_per_cloud = max_per_cloud
+        self.slot_timeout = slot_timeout
+        self.priority_step = priority_step
+        self._admit = redis_client.register_script(_ADMIT)
+
+    def admit(self, thread_id, priority=0):
+        """Queues the submission and takes a slot if it is its turn
+
+        Returns:
+            float: seconds spent queued, or None if still queued
+        """
+        now = time.time()
+        enqueued = self._admit(
+            keys=[waiting_key(self.cloud), ACTIVE, ENQUEUED, CLOUDS],
+            args=[
+                thread_id,
+                self.cloud,
+                now - priority * self.priority_step,
+                now,
+                self.max_active,
+                self.max_per_cloud,
+                now - self.slot_timeout,
+                LEASE_PREFIX,
+            ],
+        )
+        if enqueued is None:
+            return None
+
+        waited = max(now - float(enqueued), 0)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hincrby(QUEUE_STATS, "admitted")
+        pipe.hincrbyfloat(QUEUE_STATS, "wait_seconds", waited)
+        pipe.execute()
+        return waited
+
+    def release(self, thread_id):
+        """Frees the slot of a submission, or takes it out of the queue"""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zrem(ACTIVE, f"{self.cloud}|{thread_id}")
+        pipe.zrem(waiting_key(self.cloud), thread_id)
+        pipe.hdel(ENQUEUED, thread_id)
+        pipe.execute()
+
+    def stats(self):
+        """Returns queue depth, slots in use and wait times, per cloud"""
+        clouds = sorted(self._redis.smembers(CLOUDS))
+        pipe = self._redis.pipeline(transaction=False)
+        for cloud in clouds:
+            pipe.zcard(waiting_key(cloud))
+        pipe.zrange(ACTIVE, 0, -1)
+        pipe.hvals(ENQUEUED)
+        pipe.hmget(QUEUE_STATS, "admitted", "wait_seconds")
+        *depths, active, enqueued, (admitted, wait_seconds) = pipe.execute()
+
+        provisioning = dict.fromkeys(clouds, 0)
+        for slot in active:
+            cloud = slot.partition("|")[0]
+            provisioning[cloud] = provisioning.get(cloud, 0) + 1
+
+        admitted = int(admitted or 0)
+        oldest = min(map(float, enqueued), default=None)
+        return {
+            "waiting": dict(zip(clouds, depths)),
+            "provisioning": provisioning,
+            "max_provisioning": self.max_active,
+            "max_provisioning_per_cloud": self.max_per_cloud,
+            "oldest_wait_seconds": time.time() - oldest if oldest else 0,
+            "admitted": admitted,
+            "average_wait_seconds": (
+                float(wait_seconds or 0) / admitted if admitted else 0
+            ),
+        }
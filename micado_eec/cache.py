@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+CACHE_PREFIX = "eec:cache:"
+
+
+def content_key(content, *qualifiers):
+    """Hashes (base64) content and any qualifiers into a cache key"""
+    digest = hashlib.sha256(content.encode("utf-8"))
+    for qualifier in qualifiers:
+        digest.update(f"\0{qualifier}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def json_size(value):
+    return len(json.dumps(value, default=str))
+
+
+class ContentCache:
+    """In-process LRU cache keyed by content hash, bounded in bytes
+
+    The size of each entry is estimated by `sizeof` when it is stored.
+    With a Redis client and a TTL, values are also shared between
+    processes as JSON, so they must be JSON serialisable.
+    """
+
+    def __init__(self, name, max_bytes, sizeof=json_size, redis_client=None, ttl=0):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._redis = redis_client
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for key, or computes and stores it
+
+        Values are shared between callers, who must not modify them.
+        Exceptions raised by `compute` are not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        value = self._get_shared(key)
+        if value is None:
+            value = compute()
+            with self._lock:
+                self.misses += 1
+            self._set_shared(key, value)
+        else:
+            with self._lock:
+                self.shared_hits += 1
+
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def _get_shared(self, key):
+        if not (self._redis and self._ttl):
+            return None
+        value = self._redis.get(f"{CACHE_PREFIX}{self.name}:{key}")
+        return json.loads(value) if value is not None else None
+
+    def _set_shared(self, key, value):
+        if not (self._redis and self._ttl):
+            return
+        self._redis.setex(
+            f"{CACHE_PREFIX}{self.name}:{key}", self._ttl, json.dumps(value)
+        )
@@ -0,0 +1,87 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+
+from micado import MicadoClient
+
+from .fake import FakeMicadoClient
+
+MAX_ATTACHED_CLIENTS = int(os.environ.get("EEC_MAX_ATTACHED_CLIENTS", 100))
+
+# Clients of launchers that are not backed by the MiCADO client library
+CLIENT_CLASSES = {"fake": FakeMicadoClient}
+
+
+class ClientFactory:
+    """Builds the MicadoClients of this process
+
+    Clients attached to a MiCADO node are kept, with the HTTP session of
+    their submitter API, and handed out again for the same node until it
+    is forgotten. The MiCADO node spec is parsed by `load_spec` once, and
+    again only when the modification time of the spec file changes.
+
+    Unless `client_class` is given, clients are MicadoClients, or the
+    class registered for the launcher in `CLIENT_CLASSES`.
+    """
+
+    def __init__(
+        self,
+        launcher,
+        installer,
+        spec_path,
+        load_spec,
+        client_class=None,
+        max_attached=MAX_ATTACHED_CLIENTS,
+    ):
+        self.launcher = launcher
+        self.installer = installer
+        self.spec_path = spec_path
+        self._load_spec = load_spec
+        self._client_class = client_class or CLIENT_CLASSES.get(
+            launcher, MicadoClient
+        )
+        self.max_attached = max_attached
+        self._attached = OrderedDict()
+        self._spec = (None, None)
+        self._lock = threading.Lock()
+
+    def new(self):
+        """Returns a client not attached to any MiCADO node"""
+        return self._client_class(launcher=self.launcher, installer=self.installer)
+
+    def attached(self, micado_id):
+        """Returns a client attached to a MiCADO node, reusing a kept one"""
+        with self._lock:
+            client = self._attached.get(micado_id)
+            if client is not None:
+                self._attached.move_to_end(micado_id)
+                return client
+
+        client = self.new()
+        client.micado.attach(micado_id)
+        self.keep(client)
+        return client
+
+    def keep(self, client):
+        """Keeps a client attached to a node for reuse, e.g. after create"""
+        with self._lock:
+            self._attached[client.micado.micado_id] = client
+            self._attached.move_to_end(client.micado.micado_id)
+            while len(self._attached) > self.max_attached:
+                self._attached.popitem(last=False)
+
+    def forget(self, micado_id):
+        """Drops the kept client of a node, e.g. once it is destroyed"""
+        with self._lock:
+            self._attached.pop(micado_id, None)
+
+    def spec(self):
+        """Returns a copy of the MiCADO node spec, parsed once per change"""
+        mtime = os.stat(self.spec_path).st_mtime_ns
+        with self._lock:
+            cached_mtime, spec = self._spec
+            if cached_mtime != mtime:
+                spec = self._load_spec(self.spec_path)
+                self._spec = (mtime, spec)
+        return copy.deepcopy(spec)
@@ -0,0 +1,110 @@
+import json
+import os
+import random
+import time
+import uuid
+from collections import namedtuple
+
+import redis
+
+FAKE_PREFIX = "eec:fake:"
+FAKE_NODES = f"{FAKE_PREFIX}nodes"
+
+FAKE_CREATE_SECONDS = float(os.environ.get("EEC_FAKE_CREATE_SECONDS", 0))
+FAKE_DESTROY_SECONDS = float(os.environ.get("EEC_FAKE_DESTROY_SECONDS", 0))
+FAKE_FAILURE_RATE = float(os.environ.get("EEC_FAKE_FAILURE_RATE", 0))
+
+FakeApplication = namedtuple("FakeApplication", ["id"])
+
+
+class FakeLauncherError(Exception):
+    pass
+
+
+def apps_key(micado_id):
+    """Returns the set holding the applications of a fake MiCADO node"""
+    return f"{FAKE_PREFIX}apps:{micado_id}"
+
+
+class FakeMicadoClient:
+    """Stands in for MicadoClient, without building anything on a cloud
+
+    Selected by setting MICADO_CLOUD_LAUNCHER to "fake". Nodes and their
+    applications are kept in Redis, so every worker can attach to a node
+    another one created. Creating and destroying a node take the given
+    time, and fail at `failure_rate`, to load test the EEC on its own.
+    """
+
+    def __init__(
+        self,
+        launcher=None,
+        installer=None,
+        redis_client=None,
+        create_seconds=FAKE_CREATE_SECONDS,
+        destroy_seconds=FAKE_DESTROY_SECONDS,
+        failure_rate=FAKE_FAILURE_RATE,
+    ):
+        self.launcher = launcher
+        self.installer = installer
+        self.create_seconds = create_seconds
+        self.destroy_seconds = destroy_seconds
+        self.failure_rate = failure_rate
+        self._redis = redis_client or redis.StrictRedis(
+            "redis", decode_responses=True
+        )
+        self.micado = FakeMicado(self)
+        self.applications = FakeApplications(self)
+
+    def _launch(self, seconds, action):
+        time.sleep(seconds)
+        if random.random() < self.failure_rate:
+            raise FakeLauncherError(f"Fake launcher failed to {action}")
+
+
+class FakeMicado:
+    def __init__(self, client):
+        self._client = client
+        self.micado_id = None
+        self.api = None
+        self.details = None
+
+    def create(self, **spec):
+        self._client._launch(self._client.create_seconds, "create")
+        micado_id = f"fake-{uuid.uuid4()}"
+        self._client._redis.hset(FAKE_NODES, micado_id, json.dumps(spec))
+        self.attach(micado_id)
+        return micado_id
+
+    def attach(self, micado_id):
+        if not self._client._redis.hexists(FAKE_NODES, micado_id):
+            raise LookupError(f"Cannot find fake MiCADO {micado_id}")
+        self.micado_id = micado_id
+        self.api = self._client
+        self.details = f"Fake MiCADO {micado_id}\nno dashboard"
+
+    def destroy(self):
+        self._client._launch(self._client.destroy_seconds, "destroy")
+        pipe = self._client._redis.pipeline()
+        pipe.hdel(FAKE_NODES, self.micado_id)
+        pipe.delete(apps_key(self.micado_id))
+        pipe.execute()
+        self.api = None
+
+
+class FakeApplications:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, adt=None, file=None, params=None):
+        app_id = f"app-{uuid.uuid4().hex[:8]}"
+        self._client._redis.sadd(apps_key(self._client.micado.micado_id), app_id)
+        return app_id
+
+    def list(self):
+        app_ids = self._client._redis.smembers(
+            apps_key(self._client.micado.micado_id)
+        )
+        return [FakeApplication(app_id) for app_id in sorted(app_ids)]
+
+    def delete(self, app_id):
+        self._client._redis.srem(apps_key(self._client.micado.micado_id), app_id)
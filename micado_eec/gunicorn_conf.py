@@ -1,32 +1,48 @@
+import os
+
 import redis
-from micado_eec.handle_micado import HandleMicado, r
+from micado_eec.handle_micado import HandleMicado, r, registry, supervisor, events_key
 
 bind = '0.0.0.0:5000'
 
 workers = 5
+# The worker heartbeat keeps running while a request thread blocks, so
+# long-polls and event streams are bounded by the threads, not `timeout`.
+# Each holds a thread for up to MAX_WAIT_SECONDS: keep EEC_MAX_LONG_POLLS
+# plus EEC_MAX_EVENT_STREAMS below the threads, and tune them together
+worker_class = 'gthread'
+threads = int(os.environ.get("EEC_WORKER_THREADS", 16))
 timeout = 30
 
 def on_starting(server):
     server.log.info("Cleaning-up uninitialised apps...")
 
-    for thread_id in r.keys():
-        try:
-            micado = r.hget(thread_id, "micado_id")
-            updated = r.hget(thread_id, "last_app_refresh")
-        except redis.exceptions.ResponseError:
-            raise TypeError("Database corrupt - contains wrong data types.")
-        
+    indexed = registry.migrate()
+    if indexed:
+        server.log.info(f"Indexed {indexed} existing apps.")
+
+    thread_ids = registry.unrefreshed()
+    pipe = r.pipeline(transaction=False)
+    for thread_id in thread_ids:
+        pipe.hget(thread_id, "micado_id")
+    try:
+        micados = pipe.execute()
+    except redis.exceptions.ResponseError:
+        raise TypeError("Database corrupt - contains wrong data types.")
+
+    for thread_id, micado in zip(thread_ids, micados):
         if not micado:
             server.log.info(f"App {thread_id} has no MiCADO, removing from DB.")
-            r.delete(thread_id)
+            r.delete(thread_id, events_key(thread_id))
+            registry.remove(thread_id)
             continue
 
-        if not updated:
-            server.log.info(f"App {thread_id} has MiCADO, attempting abort.")
-            r.expire(thread_id, 60)
-            thread = HandleMicado(thread_id, f"process_{thread_id}")
-            thread.start()
-            thread.abort()
+        if not supervisor.acquire(thread_id):
+            server.log.info(f"App {thread_id} is owned elsewhere, skipping.")
+            continue
+        server.log.info(f"App {thread_id} has MiCADO, attempting abort.")
+        r.expire(thread_id, 60)
+        thread = HandleMicado(thread_id, f"process_{thread_id}")
+        supervisor.submit_teardown(thread.teardown)
 
     server.log.info("App clean-up done.")
-
@@ -1,15 +1,24 @@
 import os
 import io
 import base64
-import threading
+import copy
+import functools
+import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import redis
 import ruamel.yaml as yaml
-from micado import MicadoClient
-
-from .utils import base64_to_yaml, load_yaml_file, decrypt_ciphertext
+from . import spool
+from .admission import AdmissionQueue
+from .cache import ContentCache, content_key
+from .clients import ClientFactory
+from .metrics import Metrics, PHASE_BUCKETS
+from .pool import WarmPool
+from .registry import Registry
+from .supervisor import Supervisor
+from .utils import base64_to_yaml, load_yaml_file, decrypt_many, retry
 
 STATUS_INIT = 0  # initializing
 STATUS_RUNNING = 1  # running
@@ -21,6 +30,8 @@ STATUS_STOPPED = 5  # stopped
 STATUS_INFRA_INIT = "infrastructure initializing"
 STATUS_INFRA_INIT_ERROR = "error: failed to initialize infrastructure for MiCADO"
 STATUS_INFRA_BUILD = "infrastructure for MiCADO building"
+STATUS_INFRA_WARM = "infrastructure for MiCADO taken from the warm pool"
+STATUS_INFRA_QUEUED = "infrastructure for MiCADO queued for provisioning"
 STATUS_INFRA_READY = "infrastructure for MiCADO ready"
 STATUS_APP_BUILD = "application is being deployed on the infrastructure"
 STATUS_APP_READY = "application is ready"
@@ -30,6 +41,27 @@ STATUS_INFRA_REMOVING = "infrastructure for MiCADO is being removed"
 STATUS_INFRA_REMOVED = "infrastructure for MiCADO removed"
 STATUS_INFRA_REMOVE_ERROR = "failed to remove infrastructure for MiCADO"
 
+# Lifecycle phases timed in metrics, by the status detail they start with
+PHASES = {
+    STATUS_INFRA_INIT: "infra_init",
+    STATUS_INFRA_QUEUED: "infra_queued",
+    STATUS_INFRA_BUILD: "infra_build",
+    STATUS_INFRA_WARM: "infra_warm",
+    STATUS_INFRA_READY: "infra_ready",
+    STATUS_APP_BUILD: "app_build",
+    STATUS_APP_REMOVING: "app_removing",
+    STATUS_INFRA_REMOVING: "infra_removing",
+}
+
+# Names of every status detail in the timing trace of a submission
+TRACE_NAMES = {
+    **PHASES,
+    STATUS_APP_READY: "app_ready",
+    STATUS_APP_REMOVED: "app_removed",
+    STATUS_INFRA_REMOVED: "infra_removed",
+    STATUS_INFRA_REMOVE_ERROR: "infra_remove_error",
+}
+
 MICADO_CLOUD = os.environ.get("MICADO_CLOUD_LAUNCHER", "openstack")
 MICADO_INSTALLER = "ansible"
 MICADO_NODE = "micado"
@@ -42,6 +74,18 @@ INPUT_ADT_REF = "adt.yaml"
 APP_ID_PARAM = "app_id"
 APP_PARAMS = "params"
 
+ADT_CACHE_BYTES = int(os.environ.get("EEC_ADT_CACHE_BYTES", 64 * 2**20))
+
+ABORT_CHANNEL = "micado_eec:abort"
+STATUS_CHANNEL_PREFIX = "micado_eec:status:"
+EVENTS_PREFIX = "eec:events:"
+EVENTS_MAXLEN = int(os.environ.get("EEC_EVENTS_MAXLEN", 100))
+HEARTBEAT_INTERVAL = int(os.environ.get("EEC_HEARTBEAT_INTERVAL", 15))
+TEARDOWN_ATTEMPTS = int(os.environ.get("EEC_TEARDOWN_ATTEMPTS", 3))
+TEARDOWN_BACKOFF = float(os.environ.get("EEC_TEARDOWN_BACKOFF", 2))
+APP_DELETE_WORKERS = int(os.environ.get("EEC_APP_DELETE_WORKERS", 4))
+TRACE_MAXLEN = int(os.environ.get("EEC_TRACE_MAXLEN", 50))
+
 try:
     r = redis.StrictRedis("redis", decode_responses=True)
 except redis.exceptions.ConnectionError as e:
@@ -49,6 +93,114 @@ except redis.exceptions.ConnectionError as e:
 if not r.ping():
     raise ConnectionError("Cannot connect to Redis")
 
+registry = Registry(r)
+supervisor = Supervisor(r, registry, ABORT_CHANNEL, HEARTBEAT_INTERVAL)
+adt_cache = ContentCache("adt", ADT_CACHE_BYTES)
+admission = AdmissionQueue(r, MICADO_CLOUD)
+
+metrics = Metrics(r)
+metrics.histogram(
+    "eec_phase_duration_seconds",
+    "Time spent in each lifecycle phase of a submission",
+    PHASE_BUCKETS,
+)
+metrics.histogram(
+    "eec_time_to_running_seconds",
+    "Time from submission until the application first ran",
+    PHASE_BUCKETS,
+)
+metrics.counter("eec_submission_errors_total", "Submissions that ended in error")
+metrics.counter("eec_submission_aborts_total", "Submissions aborted")
+
+
+clients = ClientFactory(
+    MICADO_CLOUD,
+    MICADO_INSTALLER,
+    DEFAULT_MICADO_YAML,
+    load_spec=lambda path: _load_micado_spec(path),
+)
+pool = WarmPool(r, clients, supervisor, admission)
+
+
+def status_channel(thread_id):
+    """Returns the channel on which status changes of a submission are published"""
+    return f"{STATUS_CHANNEL_PREFIX}{thread_id}"
+
+
+def events_key(thread_id):
+    """Returns the stream holding the status history of a submission"""
+    return f"{EVENTS_PREFIX}{thread_id}"
+
+
+def render_trace(trace, now=None):
+    """Expands a stored timing trace into phases with start, end and duration
+
+    The phase still in progress has no end, and its duration so far.
+    """
+    now = now or time.time()
+    phases = []
+    for entry, following in zip(trace, [*trace[1:], None]):
+        name, start, *cause = entry
+        end = following[1] if following else None
+        phase = {
+            "phase": name,
+            "start": start,
+            "end": end,
+            "duration_seconds": round((end or now) - start, 3),
+        }
+        if cause:
+            phase["error"] = cause[0]
+        phases.append(phase)
+    return phases
+
+
+def time_to_running(trace):
+    """Returns seconds from the start of a trace until the app first ran"""
+    for name, start, *_ in trace:
+        if name == TRACE_NAMES[STATUS_APP_READY]:
+            return round(start - trace[0][1], 3)
+    return None
+
+
+def load_adt(b64_adt):
+    """Decodes a base64 ADT, reusing the result for identical content
+
+    The returned dict is shared and must not be modified.
+    """
+    return adt_cache.get_or_compute(
+        content_key(b64_adt), lambda: base64_to_yaml(b64_adt)
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def render_details(status_detail, login_info=""):
+    """Renders the base64 encoded status report of a submission
+
+    Args:
+        status_detail (str): the current status line
+        login_info (str, optional): MiCADO login info, as HTML
+
+    Returns:
+        str: base64 representation of the HTML report
+    """
+    details = f"""
+        <html>
+            <head>
+                <title>MiCADO execution status report</title>
+            </head>
+            <body>
+                <h1>Overview</h1>
+                <p>This page summarizes the status of the MiCADO deployment</p>
+                <p>Status of the deployment: <b>{status_detail}</b></p>
+                <h1>MiCADO login information</h1>
+                <p>Here you can find login info for the MiCADO dashboard:
+                {login_info}
+                </p>
+            </body>
+        </html>
+        """
+    return str(base64.standard_b64encode(details.encode()), "utf-8")
+
 
 class MicadoBuildException(Exception):
     def __init__(self, message):
@@ -65,12 +217,18 @@ class MicadoAppException(Exception):
         self.message = message
 
 
-class HandleMicado(threading.Thread):
+class HandleMicado:
 
     _abort = False
 
     status = STATUS_INIT
     status_detail = STATUS_INFRA_INIT
+    login_info = ""
+
+    _warm_id = None
+    _phase = None
+    _phase_start = None
+    _last_status = None
 
     def __init__(
         self,
@@ -83,13 +241,16 @@ class HandleMicado(threading.Thread):
         free_outputs: Optional[dict] = None,
         parameters: Optional[dict] = None,
     ):
-        super().__init__()
         self.threadID = threadID
         self.name = name
 
-        if not r.hgetall(threadID):
-            r.hset(threadID, "submit_time", time.time())
-            self.set_status()
+        pipe = r.pipeline(transaction=False)
+        pipe.exists(threadID)
+        pipe.hget(threadID, "trace")
+        exists, trace = pipe.execute()
+        self._trace = json.loads(trace) if trace else []
+        if not exists:
+            self.set_status(submit_time=time.time())
 
         self.artefact_data = artefact_data or {}
         self.inouts = inouts or {}
@@ -97,99 +258,263 @@ class HandleMicado(threading.Thread):
         self.free_inputs = free_inputs or {}
         self.final_outputs = free_outputs or {}
         self.parameters = parameters or {}
-        self.micado = MicadoClient(launcher=MICADO_CLOUD, installer=MICADO_INSTALLER)
+        self._params_by_key = {
+            definition["key"]: definition for definition in self.parameters
+        }
+        self._inputs_by_id = _index_inputs(self.inouts.get("free_inputs", []))
+        self._micado = None
 
-    def set_status(self):
-        try:
-            node_data = self.micado.micado.details.replace("\n", "<br>   ")
-        except AttributeError:
-            node_data = ""
+    @property
+    def micado(self):
+        """The MicadoClient of this submission, built when first needed"""
+        if self._micado is None:
+            self._micado = clients.new()
+        return self._micado
 
-        # Can get node data here, if relevant
+    @micado.setter
+    def micado(self, client):
+        self._micado = client
 
-        details = f"""
-        <html>
-            <head>
-                <title>MiCADO execution status report</title>
-            </head>
-            <body>
-                <h1>Overview</h1>
-                <p>This page summarizes the status of the MiCADO deployment</p>
-                <p>Status of the deployment: <b>{self.status_detail}</b></p>
-                <h1>MiCADO login information</h1>
-                <p>Here you can find login info for the MiCADO dashboard:
-                {node_data}
-                </p>
-            </body>
-        </html>
+    def set_status(self, expire=None, submit_time=None):
+        """Writes the status of the submission in a single transaction
+
+        Only the status line is stored. The report returned as `details` is
+        rendered from it and the login info by `render_details`.
+
+        Also bumps the `version` of the submission, appends the transition
+        to its bounded event stream and its timing trace, and publishes the
+        change to anyone long-polling it.
+
+        Args:
+            expire (int, optional): seconds until the submission expires
+            submit_time (float, optional): records and indexes a new submission
         """
-        r.hset(self.threadID, "status", self.status)
-        r.hset(
-            self.threadID,
-            "details",
-            str(base64.standard_b64encode(details.encode()), "utf-8"),
+        self._record_transition()
+        fields = {
+            "status": self.status,
+            "status_detail": self.status_detail,
+            "only_status": True,
+        }
+        if self._trace_transition():
+            fields["trace"] = json.dumps(self._trace, separators=(",", ":"))
+
+        pipe = r.pipeline()
+        if submit_time:
+            fields["submit_time"] = submit_time
+            registry.add(self.threadID, submit_time, client=pipe)
+        pipe.hmset(self.threadID, fields)
+        pipe.hincrby(self.threadID, "version")
+        registry.set_status(self.threadID, self.status, client=pipe)
+        pipe.execute_command(
+            "XADD", events_key(self.threadID), "MAXLEN", "~", EVENTS_MAXLEN, "*",
+            "status", self.status,
+            "detail", self.status_detail,
+            "time", time.time(),
         )
-        r.hset(self.threadID, "only_status", True)
+        if expire:
+            pipe.expire(self.threadID, expire)
+            pipe.expire(events_key(self.threadID), expire)
+            registry.expire(self.threadID, time.time() + expire, client=pipe)
+        pipe.publish(status_channel(self.threadID), self.status)
+        pipe.execute()
+
+    def _record_transition(self):
+        """Times the lifecycle phase that ends and counts errors"""
+        now = time.time()
+        if self.status_detail != self._phase:
+            if self._phase in PHASES:
+                metrics.observe(
+                    "eec_phase_duration_seconds",
+                    now - self._phase_start,
+                    {"phase": PHASES[self._phase]},
+                )
+            self._phase, self._phase_start = self.status_detail, now
+
+        if self.status == STATUS_ERROR and self._last_status != STATUS_ERROR:
+            metrics.inc("eec_submission_errors_total")
+        self._last_status = self.status
+
+    def _trace_transition(self):
+        """Appends the status to the timing trace if it starts a new phase
+
+        Entries are `[phase, start]`, with the status detail appended as
+        the cause when it is an error. Past `TRACE_MAXLEN` entries, the
+        oldest are dropped but the first, so the trace still starts at
+        the submission.
+
+        Returns:
+            bool: whether the trace changed
+        """
+        now = round(time.time(), 3)
+        name = TRACE_NAMES.get(self.status_detail, "error")
+        cause = [self.status_detail] if self.status == STATUS_ERROR else []
+        last = self._trace[-1] if self._trace else None
+        if last and [last[0], *last[2:]] == [name, *cause]:
+            return False
+
+        if name == TRACE_NAMES[STATUS_APP_READY] and self._trace:
+            if time_to_running(self._trace) is None:
+                metrics.observe(
+                    "eec_time_to_running_seconds", now - self._trace[0][1]
+                )
+        self._trace.append([name, now, *cause])
+        if len(self._trace) > TRACE_MAXLEN:
+            del self._trace[1 : len(self._trace) - TRACE_MAXLEN + 1]
+        return True
 
     def abort(self):
-        r.expire(self.threadID, 90)
-        self.status = STATUS_ABORTED
-        self.status_detail = STATUS_INFRA_REMOVING
-        self.set_status()
-        if self.micado.micado.api:
-            self._kill_micado()
-        self.status_detail = STATUS_INFRA_REMOVED
-        self.set_status()
+        metrics.inc("eec_submission_aborts_total")
+        try:
+            self.status = STATUS_ABORTED
+            self.status_detail = STATUS_INFRA_REMOVING
+            self.set_status(expire=90)
+            if self._micado is not None and self._micado.micado.api:
+                self._kill_micado()
+            self.status_detail = STATUS_INFRA_REMOVED
+            self.set_status()
+        finally:
+            spool.remove(self.threadID)
+            registry.retire(self.threadID)
+            supervisor.release(self.threadID, linger=90)
 
     def _is_aborted(self):
         if r.hexists(self.threadID, "abort"):
             return True
         return False
 
-    def run(self):
-        """Builds a MiCADO node and deploys an application"""
-        if not r.hexists(self.threadID, "micado_id"):
-            # Create MiCADO
-            micado_node_data = _get_micado_spec()
-            micado_node_data["name"] = f"MiCADO-{self.threadID}"
-            self._create_micado_node(micado_node_data)
+    def start(self):
+        """Schedules the submission lifecycle, if this process owns it
 
-            # Submit app
-            deployment_adt = self._get_adt()
-            parameters = self._load_params()
-            self._submit_app(deployment_adt, parameters)
+        A new submission takes a node from the warm pool or a provisioning
+        slot. Failing both, it is queued on the supervisor, holding no
+        worker until a slot is free.
 
-        else:
+        Returns:
+            bool: False if the submission is owned by another process
+        """
+        if not supervisor.acquire(self.threadID):
+            return False
+        if not r.hexists(self.threadID, "micado_id"):
+            self._warm_id = pool.take()
+            if not self._warm_id and not self._admit():
+                self._queue()
+                return True
+        supervisor.submit(self.run)
+        return True
+
+    def teardown(self):
+        """Attaches to the existing MiCADO and removes it"""
+        try:
             self._attach_to_existing()
+        except Exception:
+            supervisor.release(self.threadID, linger=90)
+            raise
+        self.abort()
 
-        # Wait for abort
-        while True:
-            r.hset(self.threadID, "last_app_refresh", time.time())
-            if self._is_aborted():
-                self.abort()
-                break
-            time.sleep(15)
+    def run(self):
+        """Builds a MiCADO node and deploys an application"""
+        try:
+            if not r.hexists(self.threadID, "micado_id"):
+                # Create MiCADO
+                micado_node_data = _get_micado_spec()
+                micado_node_data["name"] = f"MiCADO-{self.threadID}"
+                if not self._create_micado_node(micado_node_data):
+                    return
+
+                # Submit app
+                deployment_adt = self._get_adt()
+                parameters = self._load_params()
+                self._submit_app(deployment_adt, parameters)
+
+            else:
+                self._attach_to_existing()
+        except Exception:
+            spool.remove(self.threadID)
+            supervisor.release(self.threadID, linger=90)
+            raise
+
+        spool.remove(self.threadID)
+        supervisor.watch(self)
 
     def _create_micado_node(self, micado_node_data):
-        """Creates the MiCADO node"""
+        """Creates the MiCADO node, or attaches to the warm one taken
+
+        Expects a provisioning slot to be held, unless a warm node was
+        taken. If that node cannot be attached to, the submission takes a
+        slot instead, or is queued again for one.
+
+        Returns:
+            bool: False if the submission was queued again
+        """
         self.status = STATUS_INIT
+        if self._warm_id:
+            if self._take_warm_node(self._warm_id):
+                self.status_detail = STATUS_INFRA_WARM
+                self.set_status()
+                return True
+            if not self._admit():
+                self._queue()
+                return False
+
         self.status_detail = STATUS_INFRA_BUILD
         self.set_status()
 
         try:
             self.micado.micado.create(**micado_node_data)
         except Exception as e:
-            r.expire(self.threadID, 90)
             self.status_detail = str(e)
             self.status = STATUS_ERROR
-            self.set_status()
+            self.set_status(expire=90)
             raise
-        r.hset(self.threadID, "micado_id", self.micado.micado.micado_id)
+        finally:
+            admission.release(self.threadID)
+            supervisor.admit_queued()
+        clients.keep(self.micado)
+        self._record_micado()
 
         # TODO: Check micado is running
 
         self.status_detail = STATUS_INFRA_READY
         self.set_status()
+        return True
+
+    def _admit(self):
+        """Takes a provisioning slot, returns False if it is not our turn"""
+        try:
+            priority = int(self.artefact_data.get("priority", 0))
+        except (TypeError, ValueError):
+            priority = 0
+        return admission.admit(self.threadID, priority) is not None
+
+    def _queue(self):
+        """Queues the submission on the supervisor for a provisioning slot"""
+        self._warm_id = None
+        self.status = STATUS_INIT
+        self.status_detail = STATUS_INFRA_QUEUED
+        self.set_status()
+        supervisor.queue(self.threadID, self._admit, self.run, self._abort_queued)
+
+    def _abort_queued(self):
+        admission.release(self.threadID)
+        self.abort()
+
+    def _take_warm_node(self, micado_id):
+        """Attaches to an idle MiCADO taken from the warm pool"""
+        try:
+            self.micado = clients.attached(micado_id)
+        except Exception:
+            supervisor.submit_teardown(pool.destroy, micado_id)
+            return False
+        self._record_micado()
+        return True
+
+    def _record_micado(self):
+        """Stores the ID and login info of the MiCADO of this submission"""
+        self._cache_login_info()
+        r.hmset(
+            self.threadID,
+            {"micado_id": self.micado.micado.micado_id, "login_info": self.login_info},
+        )
 
     def _submit_app(self, app_data, params):
         """Submits an application to MiCADO"""
@@ -203,12 +528,11 @@ class HandleMicado(threading.Thread):
             else:
                 self.micado.applications.create(file=app_data, params=params)
         except Exception as e:
-            r.expire(self.threadID, 90)
             self.status = STATUS_ERROR
-            self._kill_micado(msg=str(e))
+            self._kill_micado(msg=str(e), expire=90)
             raise
         finally:
-            if isinstance(app_data, io.TextIOWrapper):
+            if isinstance(app_data, io.IOBase):
                 app_data.close()
 
         # TODO: Check app is running
@@ -221,24 +545,32 @@ class HandleMicado(threading.Thread):
         """Attempt to attach to a MiCADO belonging to the thread ID"""
         micado_id = r.hget(self.threadID, "micado_id") or ""
         try:
-            self.micado.micado.attach(micado_id)
+            self.micado = clients.attached(micado_id)
+            self._cache_login_info()
+            r.hset(self.threadID, "login_info", self.login_info)
             self.status = STATUS_RUNNING
             self.status_detail = STATUS_APP_READY
             self.set_status()
         except LookupError:
-            r.delete(self.threadID)
+            r.delete(self.threadID, events_key(self.threadID))
+            registry.remove(self.threadID)
             raise
 
+    def _cache_login_info(self):
+        """Keeps the MiCADO login info, which is fixed once the node exists"""
+        try:
+            self.login_info = self.micado.micado.details.replace("\n", "<br>   ")
+        except AttributeError:
+            self.login_info = ""
+
     def _get_adt(self):
         """Get inputs for YAML or CSAR"""
         if self.artefact_data["downloadUrl"].endswith((".yaml", ".yml")):
-            deployment_adt = base64_to_yaml(self.artefact_data["downloadUrl_content"])
+            deployment_adt = copy.deepcopy(
+                load_adt(self.artefact_data["downloadUrl_content"])
+            )
         else:
-            file_content = base64.b64decode(self.artefact_data["downloadUrl_content"])
-            file_name = f"{self.artefact_data['id']}.csar"
-            with open(file_name, "wb+") as f:
-                f.write(file_content)
-            deployment_adt = open(file_name, "rb")
+            deployment_adt = open(self.file_paths[ARTEFACT_ADT_REF], "rb")
 
         return deployment_adt
 
@@ -259,13 +591,15 @@ class HandleMicado(threading.Thread):
         parameters.update({"EMG_IV": str(self.artefact_data.get("iv", ""))})
         parameters.update({"EMG_NONCE": self.artefact_data.get("nonce", "")})
 
-        for name, value in parameters.items():
-            for definition in self.parameters:
-                if name != definition["key"]:
-                    continue
-                if definition["type"] == "secret":
-                    parameters[name] = decrypt_ciphertext(value)
-        
+        secrets = [
+            name
+            for name in parameters
+            if self._params_by_key.get(name, {}).get("type") == "secret"
+        ]
+        parameters.update(
+            zip(secrets, decrypt_many([parameters[name] for name in secrets]))
+        )
+
         return parameters
 
     def _load_files(self):
@@ -283,56 +617,69 @@ class HandleMicado(threading.Thread):
         self.status = STATUS_ABORTED
         self.status_detail = STATUS_APP_REMOVING
         self.set_status()
-        [
-            self.micado.applications.delete(app.id)
-            for app in self.micado.applications.list()
-        ]
+        app_ids = [app.id for app in self.micado.applications.list()]
+        delete = self._teardown_call(self.micado.applications.delete)
+        if app_ids:
+            with ThreadPoolExecutor(
+                min(len(app_ids), APP_DELETE_WORKERS), thread_name_prefix="app_delete"
+            ) as executor:
+                list(executor.map(delete, app_ids))
 
         self.status_detail = STATUS_APP_REMOVED
         self.set_status()
 
-    def _kill_micado(self, msg=None):
+    def _kill_micado(self, msg=None, expire=None):
         """Removes the MiCADO infrastructure and any applications"""
         self.status_detail = msg or STATUS_INFRA_REMOVING
-        self.set_status()
+        self.set_status(expire=expire)
+        micado_id = self.micado.micado.micado_id
         try:
-            self.micado.micado.destroy()
+            self._teardown_call(self.micado.micado.destroy)()
         except Exception:
             self.status = STATUS_ERROR
             self.status_detail = msg or STATUS_INFRA_REMOVE_ERROR
             self.set_status()
             raise
+        clients.forget(micado_id)
+
+    @staticmethod
+    def _teardown_call(func):
+        """Wraps a MiCADO teardown call to retry with exponential backoff"""
+        return functools.partial(
+            retry, func, attempts=TEARDOWN_ATTEMPTS, backoff=TEARDOWN_BACKOFF
+        )
 
     def _is_valid_input(self, input_to_check):
         """Checks if the input is valid"""
         try:
-            available = [
-                _input
-                for _input in self.inouts.get("free_inputs", [])
-                if _input["id"] == input_to_check["id"]
-            ]
+            return self._inputs_by_id.get(input_to_check["id"]) is not None
         except KeyError:
             raise MicadoBuildException(f"Malformed input: {input_to_check}")
-        return len(available) == 1
 
     def _is_valid_param(self, key_to_check):
         """Checks if the parameter is valid"""
-        available = {
-            value
-            for element in self.parameters
-            for value in element.values()
-            if value == key_to_check
-        }
-        return len(available) > 0
+        return key_to_check in self._params_by_key
+
+
+def _index_inputs(inputs):
+    """Maps input IDs to inputs, or to None for IDs given more than once"""
+    index = {}
+    for _input in inputs:
+        if "id" in _input:
+            index[_input["id"]] = None if _input["id"] in index else _input
+    return index
 
 
 def _get_micado_spec():
-    """Retrieves the MiCADO node configuration"""
+    """Retrieves the MiCADO node configuration, parsed once per file change"""
+    return clients.spec()
+
+
+def _load_micado_spec(path):
+    """Parses the MiCADO node configuration"""
     try:
-        properties = load_yaml_file(DEFAULT_MICADO_YAML)["properties"]
+        properties = load_yaml_file(path)["properties"]
     except (yaml.YAMLError, KeyError):
-        raise MicadoInfraException(
-            f"Could not get default MiCADO spec from {DEFAULT_MICADO_YAML}"
-        )
+        raise MicadoInfraException(f"Could not get default MiCADO spec from {path}")
 
     return {key: val for key, val in properties.items() if val is not None}
@@ -0,0 +1,73 @@
+import os
+import socket
+import uuid
+
+LEASE_PREFIX = "lease:"
+
+_RENEW = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def lease_key(thread_id):
+    return f"{LEASE_PREFIX}{thread_id}"
+
+
+class Leases:
+    """Grants a single process ownership of each submission
+
+    A lease is a string key stored next to the submission hash, holding
+    the ID of the owning process. It is set with NX and a TTL, renewed by
+    the owner on every heartbeat and expires if the owner dies, at which
+    point any worker may take the submission over.
+    """
+
+    def __init__(self, redis_client, ttl):
+        self._redis = redis_client
+        self.ttl_ms = int(ttl * 1000)
+        self._renew = redis_client.register_script(_RENEW)
+        self._release = redis_client.register_script(_RELEASE)
+        self.reset()
+
+    def reset(self):
+        """Picks a new owner ID, e.g. after a fork"""
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    def owner_of(self, thread_id):
+        return self._redis.get(lease_key(thread_id))
+
+    def acquire(self, thread_id):
+        """Takes or renews the lease, returns True if this process owns it"""
+        key = lease_key(thread_id)
+        if self._redis.set(key, self.owner, nx=True, px=self.ttl_ms):
+            return True
+        return bool(self._renew(keys=[key], args=[self.owner, self.ttl_ms]))
+
+    def renew(self, thread_ids):
+        """Renews many leases in one round trip, returns which are still held"""
+        pipe = self._redis.pipeline(transaction=False)
+        for thread_id in thread_ids:
+            self._renew(
+                keys=[lease_key(thread_id)],
+                args=[self.owner, self.ttl_ms],
+                client=pipe,
+            )
+        return [bool(renewed) for renewed in pipe.execute()]
+
+    def release(self, thread_id, linger=None):
+        """Gives up the lease, or keeps it for `linger` seconds unrenewed"""
+        key = lease_key(thread_id)
+        if linger:
+            self._renew(keys=[key], args=[self.owner, int(linger * 1000)])
+        else:
+            self._release(keys=[key], args=[self.owner])
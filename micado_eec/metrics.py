@@ -0,0 +1,118 @@
+import threading
+from collections import defaultdict
+
+METRICS_PREFIX = "eec:metrics:"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PHASE_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+
+def _labels(labels):
+    return ",".join(
+        f'{name}="{_escape(value)}"' for name, value in sorted(labels.items())
+    )
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name, labels, value):
+    return f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+
+
+class Metrics:
+    """Counters and histograms shared by every process, in Prometheus format
+
+    Observations are accumulated in process and added to one Redis hash
+    per metric by `flush`, with HINCRBYFLOAT, so the totals of all gunicorn
+    workers add up no matter which one is scraped. Histogram buckets are
+    stored cumulatively, as they are exposed.
+    """
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._metrics = {}
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._metrics[name] = ("counter", help_text, None)
+
+    def histogram(self, name, help_text, buckets):
+        self._metrics[name] = ("histogram", help_text, tuple(buckets))
+
+    def inc(self, name, labels=None, value=1):
+        with self._lock:
+            self._pending[(name, _labels(labels or {}))] += value
+
+    def observe(self, name, value, labels=None):
+        labels = _labels(labels or {})
+        _, _, buckets = self._metrics[name]
+        with self._lock:
+            for bound in buckets:
+                if value <= bound:
+                    self._pending[(name, f"{labels}|{bound}")] += 1
+            self._pending[(name, f"{labels}|+Inf")] += 1
+            self._pending[(name, f"{labels}|sum")] += value
+
+    def flush(self):
+        """Adds the observations of this process to the shared totals"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+        if not pending:
+            return
+
+        pipe = self._redis.pipeline(transaction=False)
+        for (name, field), value in pending.items():
+            pipe.hincrbyfloat(f"{METRICS_PREFIX}{name}", field, value)
+        pipe.execute()
+
+    def render(self):
+        """Returns the shared counters and histograms as exposition text"""
+        names = sorted(self._metrics)
+        pipe = self._redis.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(f"{METRICS_PREFIX}{name}")
+
+        lines = []
+        for name, values in zip(names, pipe.execute()):
+            kind, help_text, buckets = self._metrics[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            if kind == "counter":
+                lines += [
+                    _sample(name, labels, _number(value))
+                    for labels, value in sorted(values.items())
+                ]
+            else:
+                lines += _render_histogram(name, buckets, values)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def render_gauge(name, help_text, samples):
+        """Returns exposition text for a gauge, from (labels, value) pairs"""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [_sample(name, _labels(labels), value) for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(name, buckets, values):
+    series = defaultdict(dict)
+    for field, value in values.items():
+        labels, _, suffix = field.rpartition("|")
+        series[labels][suffix] = value
+
+    lines = []
+    for labels, fields in sorted(series.items()):
+        sep = "," if labels else ""
+        for bound in [*map(str, buckets), "+Inf"]:
+            count = _number(fields.get(bound, 0))
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+        lines.append(_sample(f"{name}_sum", labels, fields.get("sum", 0)))
+        lines.append(_sample(f"{name}_count", labels, _number(fields.get("+Inf", 0))))
+    return lines
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -1,35 +1,200 @@
 import json
+import os
+import shutil
+import threading
 import uuid
-import tempfile
 import time
 from datetime import datetime
 
-import redis
-from flask import jsonify, Flask, request
-from werkzeug.exceptions import BadRequest, NotFound
+from flask import g, jsonify, Flask, Request, request
+from werkzeug.exceptions import (
+    BadRequest,
+    NotFound,
+    RequestEntityTooLarge,
+    ServiceUnavailable,
+)
+
+from . import spool
+from .cache import ContentCache, content_key
+from .handle_micado import (
+    HandleMicado,
+    adt_cache,
+    admission,
+    load_adt,
+    metrics,
+    pool,
+    r,
+    registry,
+    supervisor,
+    events_key,
+    render_details,
+    render_trace,
+    status_channel,
+    time_to_running,
+    ABORT_CHANNEL,
+    ARTEFACT_ADT_REF,
+    STATUS_INIT,
+)
+from .lease import lease_key
+from .metrics import Metrics, METRICS_PREFIX, REQUEST_BUCKETS
+from .utils import (
+    b64decode_to_file,
+    is_valid_adt,
+    get_adt_inputs,
+    get_csar_inputs,
+    read_csar_inputs,
+    file_to_json,
+)
+
+MAX_UPLOAD_BYTES = int(os.environ.get("EEC_MAX_UPLOAD_BYTES", 2**30))
+
+WORKERS_KEY = f"{METRICS_PREFIX}workers"
+STATUS_NAMES = ("init", "running", "results", "error", "aborted", "stopped")
+
+# Spool directories younger than this may still be in use by a request
+SPOOL_RECLAIM_AGE = int(os.environ.get("EEC_SPOOL_RECLAIM_AGE", 300))
+
+
+class SpoolingRequest(Request):
+    """Streams uploaded files straight into an incoming spool directory
+
+    The directory is handed over to the submission with `claim_spool`,
+    or removed when the request ends.
+    """
+
+    spool_dir = None
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        if self.spool_dir is None:
+            self.spool_dir = spool.create_incoming()
+        return spool.create_part(self.spool_dir)
+
+    def claim_spool(self, thread_id):
+        """Returns the spool directory of a submission, with any uploads"""
+        if self.spool_dir is None:
+            return spool.create(thread_id)
+        path, self.spool_dir = spool.claim(self.spool_dir, thread_id), None
+        return path
 
-from .handle_micado import HandleMicado, r
-from .utils import base64_to_yaml, is_valid_adt, get_adt_inputs, get_csar_inputs, file_to_json
 
 app = Flask(__name__)
 app.debug = True
+app.request_class = SpoolingRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
+STATUS_FIELDS = ("status", "details", "onlyStatus")
+
+# Hash fields behind STATUS_FIELDS, the last three only needed for details
+_HASH_FIELDS = ("status", "only_status", "status_detail", "login_info", "details")
+
+REMOVAL_INITIATED = "submission removal successfully initiated"
+REMOVAL_PENDING = "Already processing submission removal..."
+
+# Long-polls and event streams each hold a worker thread for up to this
+# long. Together, MAX_LONG_POLLS and MAX_EVENT_STREAMS are kept below the
+# threads of a worker (EEC_WORKER_THREADS), so that they cannot starve
+# other requests: tune the three with MAX_WAIT_SECONDS
+MAX_WAIT_SECONDS = 25
+EVENTS_RETRY_MS = 1000
+MAX_LONG_POLLS = int(os.environ.get("EEC_MAX_LONG_POLLS", 6))
+MAX_EVENT_STREAMS = int(os.environ.get("EEC_MAX_EVENT_STREAMS", 6))
+
+PORTS_CACHE_BYTES = int(os.environ.get("EEC_PORTS_CACHE_BYTES", 16 * 2**20))
+PORTS_CACHE_TTL = int(os.environ.get("EEC_PORTS_CACHE_TTL", 0))
+
+_read_if_changed = r.register_script(
+    """
+    if redis.call("exists", KEYS[1]) == 0 then
+        return {}
+    end
+    local version = redis.call("hget", KEYS[1], "version") or "0"
+    if version == ARGV[1] then
+        return {version}
+    end
+    return {version, unpack(redis.call("hmget", KEYS[1], unpack(ARGV, 2)))}
+    """
+)
+
+ports_cache = ContentCache(
+    "ports", PORTS_CACHE_BYTES, redis_client=r, ttl=PORTS_CACHE_TTL
+)
+_long_polls = threading.BoundedSemaphore(MAX_LONG_POLLS)
+_event_streams = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+
+def _resume_submissions():
+    """Takes over running submissions whose lease has expired"""
+    owned = set(supervisor.owned)
+    stale = registry.stale(time.time() - 2 * supervisor.interval)
+    for thread_id in registry.prune(stale):
+        if thread_id in owned or not supervisor.acquire(thread_id):
+            continue
 
-for thread_id in r.keys():
-    try:
-        updated = r.hget(thread_id, "last_app_refresh")
-    except redis.exceptions.ResponseError:
-        raise TypeError("Database corrupt - contains wrong data types.")
-
-    if not updated:
-        continue
-    
-    age_seconds = time.time() - float(updated)
-    if age_seconds > 30:
-        r.hset(thread_id, "last_app_refresh", time.time())
         thread = HandleMicado(thread_id, f"process_{thread_id}")
         thread.start()
 
 
+def _reclaim_spool(min_age=SPOOL_RECLAIM_AGE):
+    """Removes spool directories no submission is still building from
+
+    Uploads abandoned mid-request, and submissions that are gone,
+    finished building or lost their owner, no longer need their files.
+    """
+    entries = [
+        entry for entry in spool.entries()
+        if entry.mtime < time.time() - min_age
+    ]
+    submissions = [entry for entry in entries if entry.thread_id is not None]
+
+    pipe = r.pipeline(transaction=False)
+    for entry in submissions:
+        pipe.hget(entry.thread_id, "status")
+        pipe.exists(lease_key(entry.thread_id))
+    states = pipe.execute() if submissions else []
+    building = {
+        entry.path
+        for entry, status, leased in zip(submissions, states[::2], states[1::2])
+        if status is not None and int(status) == STATUS_INIT and leased
+    }
+
+    for entry in entries:
+        if entry.path not in building:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _flush_metrics():
+    """Adds local metrics to the shared ones and reports this worker's load"""
+    metrics.flush()
+    r.hset(
+        WORKERS_KEY,
+        supervisor.leases.owner,
+        json.dumps(
+            {
+                "owned": len(supervisor.owned),
+                "watched": len(supervisor.watched),
+                "time": time.time(),
+            }
+        ),
+    )
+
+
+metrics.histogram(
+    "eec_request_duration_seconds",
+    "Time taken to respond to requests, per route",
+    REQUEST_BUCKETS,
+)
+
+registry.migrate()
+_resume_submissions()
+supervisor.add_task(_resume_submissions)
+supervisor.add_task(lambda: registry.remove_expired(time.time()))
+supervisor.add_task(_reclaim_spool)
+supervisor.add_task(pool.replenish)
+supervisor.add_task(_flush_metrics)
+
+
 @app.errorhandler(BadRequest)
 def handle_generic_bad_request(error):
     return jsonify({"error": f"{error}"}), 400
@@ -40,6 +205,39 @@ def handle_generic_not_found(error):
     return jsonify({"error": f"{error}"}), 404
 
 
+@app.errorhandler(RequestEntityTooLarge)
+def handle_upload_too_large(error):
+    return jsonify({"error": f"{error}"}), 413
+
+
+@app.errorhandler(ServiceUnavailable)
+def handle_service_unavailable(error):
+    return jsonify({"error": f"{error}"}), 503, error.get_headers()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    """Observes request latency, up to the first byte of streamed responses"""
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe(
+        "eec_request_duration_seconds",
+        time.perf_counter() - g.request_start,
+        {"route": route, "method": request.method},
+    )
+    return response
+
+
+@app.teardown_request
+def discard_unclaimed_upload(error):
+    if request.spool_dir:
+        shutil.rmtree(request.spool_dir, ignore_errors=True)
+
+
 @app.errorhandler(json.decoder.JSONDecodeError)
 def handle_json_decode_error(error):
     return (
@@ -111,7 +309,7 @@ def _get_artefact_data(request):
         return file_to_json(request.files["artefact_data"])
 
 
-def _get_artefact_ports(artefact_data):
+def _get_artefact_ports(artefact_data, csar_path=None):
     """Fetches input, outputs and parameters to return via get_ports()
 
     List items under `free_inputs` and `free_outputs` contain these keys:
@@ -127,18 +325,45 @@ def _get_artefact_ports(artefact_data):
         key: the key for the parameter,
         description: a textual description for the parameter for the user.
 
+    Results are cached by the content of the artefact. A CSAR already
+    decoded to `csar_path` is read from there, not decoded again.
+
+    Returns:
+        tuple of lists of dicts: `free_inputs`, `free_outputs`, `parameters`
+    """
+    is_csar = artefact_data["downloadUrl"].endswith(".csar")
+    try:
+        content = artefact_data["downloadUrl_content"]
+    except KeyError:
+        raise BadRequest("downloadUrl_content: Not found in artefact_data!")
+
+    return ports_cache.get_or_compute(
+        content_key(content, is_csar),
+        lambda: _find_artefact_ports(content, is_csar, csar_path),
+    )
+
+
+def _find_artefact_ports(content, is_csar, csar_path=None):
+    """Decodes and parses an artefact to find its ports
+
+    Args:
+        content (str): base64 encoded ADT or CSAR
+        is_csar (bool): whether the artefact is a CSAR
+        csar_path (str, optional): path to the CSAR, already decoded
+
     Returns:
         tuple of lists of dicts: `free_inputs`, `free_outputs`, `parameters`
     """
     free_inputs, free_outputs, parameters = [], [], []
-    if artefact_data["downloadUrl"].endswith(".csar"):
-        params = get_csar_inputs(artefact_data["downloadUrl_content"])
+    if is_csar:
+        if csar_path:
+            params = read_csar_inputs(csar_path)
+        else:
+            params = get_csar_inputs(content)
         return [], [], params
 
     try:
-        artefact_content = base64_to_yaml(artefact_data["downloadUrl_content"])
-    except KeyError:
-        raise BadRequest("downloadUrl_content: Not found in artefact_data!")
+        artefact_content = load_adt(content)
     except ValueError:
         raise BadRequest("downloadUrl_content: Must be Base64 encoded YAML!")
 
@@ -154,6 +379,16 @@ def _get_artefact_ports(artefact_data):
     return free_inputs, free_outputs, parameters
 
 
+@app.route("/micado_eec/cache_info", methods=["GET"])
+def get_cache_info():
+    """Returns hit/miss counters and sizes of the artefact caches
+
+    Returns:
+        Response: JSON object
+    """
+    return jsonify({"adt": adt_cache.stats(), "ports": ports_cache.stats()})
+
+
 @app.route("/micado_eec/artefact_behavior", methods=["GET"])
 def get_properties():
     """Retrieves artefact termination behaviour, given artefact data
@@ -192,30 +427,20 @@ def submit_micado():
     except KeyError as error:
         raise BadRequest(f"Missing input: {error}")
 
-    submission_id = _submit_micado(
-        artefact_data,
-        inouts,
-        files,
-        *_get_artefact_ports(artefact_data),
-    )
+    submission_id = _submit_micado(artefact_data, inouts, files)
     return jsonify({"submission_id": submission_id})
 
 
-def _submit_micado(
-    artefact_data,
-    inouts,
-    files,
-    free_inputs,
-    free_outputs,
-    parameters,
-):
+def _submit_micado(artefact_data, inouts, files):
     """Submits the artefact as an ADT to MiCADO
 
+    A CSAR is decoded once, into the spool directory of the submission,
+    and its ports are read from there on a cache miss.
+
     Args:
         artefact_data (dict): JSON representation of artefact
         inouts (dict): content of input, output and parameters
         passfiles (dict): dict {file ID: JSON repr of file}
-        artefact_ports (tuple): free_inputs, free_outputs and parameters
 
     Returns:
         string: ID of this submission (also of the thread)
@@ -224,8 +449,24 @@ def _submit_micado(
         thread_id = artefact_data["emgwamId"]
     except KeyError:
         raise KeyError("Could not get emgwamId from artefact_data")
-    
-    file_paths = _write_files(files)
+
+    is_csar = not artefact_data["downloadUrl"].endswith((".yaml", ".yml"))
+    spool_dir = request.claim_spool(thread_id)
+    try:
+        file_paths = _write_files(files, spool_dir)
+        csar_path = None
+        if is_csar and "downloadUrl_content" in artefact_data:
+            csar_path = _write_csar(artefact_data["downloadUrl_content"], spool_dir)
+            file_paths[ARTEFACT_ADT_REF] = csar_path
+        free_inputs, free_outputs, parameters = _get_artefact_ports(
+            artefact_data, csar_path
+        )
+    except Exception:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        raise
+    if csar_path:
+        del artefact_data["downloadUrl_content"]
+
     thread = HandleMicado(
         thread_id,
         f"process_{thread_id}",
@@ -236,53 +477,389 @@ def _submit_micado(
         free_outputs,
         parameters,
     )
-    thread.start()
+    if not thread.start():
+        shutil.rmtree(spool_dir, ignore_errors=True)
     return thread_id
 
 
-def _write_files(files):
+def _write_files(files, spool_dir):
     """Writes any additional files to disk and returns their location
 
+    Uploads already spooled to the directory are moved into place, and
+    any other spooled parts, such as the parsed JSON inputs, are removed.
+
     Args:
         files (dict): map of file identifiers with their file data
+        spool_dir (str): spool directory of the submission
 
     Returns:
         dict: map of file identifiers with their file paths
     """
-    tempdir = tempfile.mkdtemp()
     file_paths = {}
 
     for filename, file in files.items():
-        path = tempdir + "/" + filename
-        file.save(path)
+        path = os.path.join(spool_dir, filename)
+        part = _spooled_part(file, spool_dir)
+        if part:
+            os.replace(part, path)
+        else:
+            file.save(path)
 
         print(f"Wrote content of file {filename} to {path}")
         file_paths[filename] = path
 
+    spool.remove_parts(spool_dir)
     return file_paths
 
 
+def _spooled_part(file, spool_dir):
+    """Returns the path of an upload spooled to spool_dir, if it was"""
+    name = os.path.basename(str(getattr(file.stream, "name", "")))
+    path = os.path.join(spool_dir, name)
+    if name.startswith(spool.PART_PREFIX) and os.path.isfile(path):
+        return path
+    return None
+
+
+def _write_csar(b64_csar, spool_dir):
+    """Decodes a base64 CSAR into the spool directory, once per submission
+
+    Args:
+        b64_csar (str): base64 representation of the CSAR
+        spool_dir (str): spool directory of the submission
+
+    Returns:
+        str: path to the CSAR
+    """
+    path = os.path.join(spool_dir, "deployment.csar")
+    with open(path, "wb") as csar:
+        b64decode_to_file(b64_csar, csar)
+    return path
+
+
+@app.route("/micado_eec/spool_info", methods=["GET"])
+def get_spool_info():
+    """Returns the disk usage of submission spool directories
+
+    Returns:
+        Response: JSON object
+    """
+    return jsonify(spool.usage())
+
+
+@app.route("/micado_eec/pool_info", methods=["GET"])
+def get_pool_info():
+    """Returns the size of the warm pool of MiCADO nodes
+
+    Returns:
+        Response: JSON object
+    """
+    return jsonify(pool.sizes())
+
+
+@app.route("/micado_eec/queue_info", methods=["GET"])
+def get_queue_info():
+    """Returns the depth and wait times of the provisioning queue
+
+    Returns:
+        Response: JSON object
+    """
+    return jsonify(admission.stats())
+
+
+@app.route("/micado_eec/metrics", methods=["GET"])
+def get_metrics():
+    """Returns metrics of all workers in the Prometheus text format
+
+    Counters and histograms are flushed by every worker on each supervisor
+    tick, and by this one before it responds. Gauges are read on demand.
+
+    Returns:
+        Response: text/plain exposition format
+    """
+    metrics.flush()
+    return app.response_class(
+        metrics.render() + _render_gauges(),
+        mimetype="text/plain; version=0.0.4",
+    )
+
+
+def _render_gauges():
+    start = time.perf_counter()
+    r.ping()
+    ping = time.perf_counter() - start
+
+    workers = r.hgetall(WORKERS_KEY)
+    counts = dict.fromkeys(STATUS_NAMES, 0)
+    for status, count in registry.status_counts().items():
+        if 0 <= status < len(STATUS_NAMES):
+            counts[STATUS_NAMES[status]] += count
+
+    handlers, gone = [], []
+    for owner, report in sorted(workers.items()):
+        report = json.loads(report)
+        if report["time"] < time.time() - 3 * supervisor.interval:
+            gone.append(owner)
+            continue
+        handlers += [
+            ({"worker": owner, "state": "owned"}, report["owned"]),
+            ({"worker": owner, "state": "watched"}, report["watched"]),
+        ]
+    if gone:
+        r.hdel(WORKERS_KEY, *gone)
+
+    queue = admission.stats()
+    nodes = pool.sizes()
+    return "".join(
+        [
+            Metrics.render_gauge(
+                "eec_submissions",
+                "Submissions known to the EEC, per status",
+                [({"status": status}, count) for status, count in counts.items()],
+            ),
+            Metrics.render_gauge(
+                "eec_worker_submissions",
+                "Submissions owned and watched by each worker process",
+                handlers,
+            ),
+            Metrics.render_gauge(
+                "eec_provisioning_queue_depth",
+                "Submissions queued for provisioning, per cloud",
+                [({"cloud": cloud}, n) for cloud, n in queue["waiting"].items()],
+            ),
+            Metrics.render_gauge(
+                "eec_provisioning_oldest_wait_seconds",
+                "Time the oldest queued submission has waited",
+                [({}, queue["oldest_wait_seconds"])],
+            ),
+            Metrics.render_gauge(
+                "eec_pool_nodes",
+                "MiCADO nodes in the warm pool",
+                [
+                    ({"state": "idle"}, nodes["idle"]),
+                    ({"state": "provisioning"}, nodes["provisioning"]),
+                ],
+            ),
+            Metrics.render_gauge(
+                "eec_redis_ping_seconds",
+                "Round trip time to Redis, measured on scrape",
+                [({}, ping)],
+            ),
+        ]
+    )
+
+
 @app.route("/micado_eec/submissions/<submission_id>", methods=["GET"])
 def get_submission(submission_id):
     """Retrieves details of a specific submission, by its ID
 
+    The response carries the status version as its ETag. A request with a
+    matching If-None-Match header gets 304 Not Modified, without details.
+    With `?wait=<seconds>`, the request is held until the version differs
+    from `?since=<version>` (or the ETag sent), for up to MAX_WAIT_SECONDS,
+    and gets 304 if it did not. Without `wait`, `since` is ignored. Beyond
+    MAX_LONG_POLLS held in this worker, the request is answered at once.
+
     Args:
         submission_id (str): ID of the submission to retrieve
 
     Returns:
         Response: JSON object
     """
-    submission = r.hgetall(submission_id)
-    if not submission:
+    try:
+        wait = min(float(request.args.get("wait", 0)), MAX_WAIT_SECONDS)
+    except ValueError:
+        raise BadRequest("wait: Must be a number of seconds")
+    etags = list(request.if_none_match)
+    seen = etags[0] if etags else ""
+    if wait > 0:
+        seen = request.args.get("since", seen)
+        if seen and _long_polls.acquire(blocking=False):
+            try:
+                _wait_for_change(submission_id, seen, wait)
+            finally:
+                _long_polls.release()
+
+    version, *values = _read_if_changed(
+        keys=[submission_id], args=[seen, *_HASH_FIELDS]
+    ) or [None]
+    if version is None or (values and values[0] is None):
         raise NotFound(f"Cannot find submission {submission_id}")
 
+    if not values:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(_to_status_info(values))
+    response.set_etag(version)
+    return response
+
+
+def _wait_for_change(submission_id, since, timeout):
+    """Blocks until the status version of a submission differs from `since`
+
+    Args:
+        submission_id (str): ID of the submission to watch
+        since (str): last version seen by the client
+        timeout (float): maximum number of seconds to wait
+    """
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(status_channel(submission_id))
+    try:
+        deadline = time.monotonic() + timeout
+        while (r.hget(submission_id, "version") or "0") == since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            pubsub.get_message(timeout=remaining)
+    finally:
+        pubsub.close()
+
+
+@app.route("/micado_eec/submissions/status", methods=["GET", "POST"])
+def get_submissions_status():
+    """Retrieves details of many submissions at once, by their IDs
+
+    IDs and an optional selection of fields are read from a JSON body
+    ({"ids": [...], "fields": [...]}) or from comma-separated `ids` and
+    `fields` query parameters. Unknown IDs are returned as null.
+
+    Returns:
+        Response: JSON object mapping submission IDs to their details
+    """
+    if request.is_json:
+        submission_ids = _json_list("ids")
+        fields = _json_list("fields")
+    else:
+        submission_ids = _split_arg("ids")
+        fields = _split_arg("fields")
+
+    if not submission_ids or not isinstance(submission_ids, list):
+        raise BadRequest("Missing input: ids")
+    unknown = set(fields or []) - set(STATUS_FIELDS)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    statuses = _get_status_info(submission_ids, fields)
+    return jsonify({"submissions": dict(zip(submission_ids, statuses))})
+
+
+def _split_arg(name):
+    """Splits a comma-separated query parameter into a list"""
+    value = request.args.get(name)
+    return [item for item in value.split(",") if item] if value else None
+
+
+def _json_list(name):
+    """Reads a list of strings from the JSON object in the request body"""
+    if not isinstance(request.json, dict):
+        raise BadRequest("Request body must be a JSON object")
+    value = request.json.get(name)
+    if value is not None and not (
+        isinstance(value, list) and all(isinstance(item, str) for item in value)
+    ):
+        raise BadRequest(f"{name}: Must be a list of strings")
+    return value
+
+
+def _get_status_info(submission_ids, fields=None):
+    """Reads status info of submissions in one pipelined round trip
+
+    Args:
+        submission_ids (list): IDs of the submissions to read
+        fields (list, optional): STATUS_FIELDS to return.
+            Defaults to all of them.
+
+    Returns:
+        list: dict of status info per submission, or None if not found
+    """
+    fields = fields or STATUS_FIELDS
+    keys = _HASH_FIELDS if "details" in fields else _HASH_FIELDS[:2]
+
+    pipe = r.pipeline(transaction=False)
+    for submission_id in submission_ids:
+        pipe.hmget(submission_id, *keys)
+
+    return [
+        _to_status_info(values, fields) if values[0] is not None else None
+        for values in pipe.execute()
+    ]
+
+
+def _to_status_info(values, fields=STATUS_FIELDS):
+    """Builds the status info of a submission from its hash fields
+
+    Args:
+        values (list): values of _HASH_FIELDS, in order
+        fields (list, optional): STATUS_FIELDS to return
+
+    Returns:
+        dict: status info of the submission
+    """
+    submission = dict(zip(_HASH_FIELDS, values))
     status_info = {
-        "status": r.hget(submission_id, "status"),
-        "details": r.hget(submission_id, "details"),
-        "onlyStatus": r.hget(submission_id, "only_status"),
+        "status": submission["status"],
+        "onlyStatus": submission["only_status"],
     }
+    if "details" in fields:
+        # Submissions stored before reports were rendered on read
+        status_info["details"] = (
+            render_details(submission["status_detail"], submission["login_info"] or "")
+            if submission["status_detail"] is not None
+            else submission["details"]
+        )
+
+    return {field: status_info[field] for field in fields}
+
+
+@app.route("/micado_eec/submissions/<submission_id>/events", methods=["GET"])
+def get_submission_events(submission_id):
+    """Streams the status transitions of a submission as server-sent events
+
+    Recorded transitions are replayed first, starting after the
+    Last-Event-ID header when a client reconnects. The stream is closed
+    after MAX_WAIT_SECONDS, and clients reconnect to carry on. Each stream
+    holds a worker thread, so beyond MAX_EVENT_STREAMS open in this worker
+    the request gets 503 with a Retry-After, and should poll meanwhile.
+
+    Args:
+        submission_id (str): ID of the submission to follow
+
+    Returns:
+        Response: text/event-stream of JSON status events
+    """
+    if not r.exists(submission_id):
+        raise NotFound(f"Cannot find submission {submission_id}")
+
+    if not _event_streams.acquire(blocking=False):
+        raise ServiceUnavailable(
+            "Too many open event streams", retry_after=EVENTS_RETRY_MS // 1000
+        )
+    last_id = request.headers.get("Last-Event-ID", "0-0")
+    response = app.response_class(
+        _stream_events(submission_id, last_id), mimetype="text/event-stream"
+    )
+    response.call_on_close(_event_streams.release)
+    return response
+
 
-    return jsonify(status_info)
+def _stream_events(submission_id, last_id):
+    """Yields status events of a submission recorded after `last_id`"""
+    yield f"retry: {EVENTS_RETRY_MS}\n\n"
+
+    deadline = time.monotonic() + MAX_WAIT_SECONDS
+    while True:
+        remaining = int((deadline - time.monotonic()) * 1000)
+        if remaining <= 0:
+            return
+        reply = r.execute_command(
+            "XREAD", "BLOCK", remaining, "STREAMS", events_key(submission_id), last_id
+        )
+        if not reply:
+            return
+
+        for last_id, fields in reply[0][1]:
+            event = dict(zip(fields[::2], fields[1::2]))
+            yield f"id: {last_id}\nevent: status\ndata: {json.dumps(event)}\n\n"
 
 
 @app.route(
@@ -291,17 +868,27 @@ def get_submission(submission_id):
 def get_micado_resource_usage(submission_id):
     """Retrieves resource usage thus far for a submission, by ID
 
+    Includes the timing trace of the submission: each lifecycle phase it
+    went through with its start, end and duration, and the cause of any
+    error, as well as the time it took until the application first ran.
+
     Args:
         submission_id (str): ID of the submission to retrieve
 
     Returns:
         Response: JSON object
     """
-    submission = r.hgetall(submission_id)
-    if not submission:
+    submit_time, trace = r.hmget(submission_id, "submit_time", "trace")
+    if submit_time is None:
         raise NotFound(f"Cannot find submission {submission_id}")
-    runtime = runtime_seconds(r.hget(submission_id, "submit_time"))
-    return jsonify({"runtime_seconds": runtime})
+    trace = json.loads(trace) if trace else []
+    return jsonify(
+        {
+            "runtime_seconds": runtime_seconds(submit_time),
+            "time_to_running_seconds": time_to_running(trace),
+            "trace": render_trace(trace),
+        }
+    )
 
 
 @app.route("/micado_eec/submissions/<submission_id>", methods=["DELETE"])
@@ -324,14 +911,67 @@ def _remove_micado(submission_id):
     Args:
         submission_id (str): ID of the submission to remove
     """
-    submission = r.hgetall(submission_id)
-    if not submission:
+    [removal] = _abort_submissions([submission_id])
+    if removal is None:
         raise NotFound(f"Cannot find submission {submission_id}")
-    elif r.hexists(submission_id, "abort"):
-        return jsonify({"status": "Already processing submission removal..."}), 202
+    elif removal == REMOVAL_PENDING:
+        return jsonify({"status": removal}), 202
+    return jsonify({"status": removal})
+
+
+@app.route("/micado_eec/submissions", methods=["DELETE"])
+def remove_micados():
+    """Aborts many submissions at once, by their IDs
 
-    r.hset(submission_id, "abort", True)
-    return jsonify({"status": "submission removal successfully initiated"})
+    IDs are read from a JSON body ({"ids": [...]}) or from a
+    comma-separated `ids` query parameter. Unknown IDs are returned as null.
+
+    Returns:
+        Response: JSON object mapping submission IDs to their removal status
+    """
+    if request.is_json:
+        submission_ids = _json_list("ids")
+    else:
+        submission_ids = _split_arg("ids")
+
+    if not submission_ids or not isinstance(submission_ids, list):
+        raise BadRequest("Missing input: ids")
+
+    removals = _abort_submissions(submission_ids)
+    return jsonify({"submissions": dict(zip(submission_ids, removals))})
+
+
+def _abort_submissions(submission_ids):
+    """Flags submissions for removal and notifies their owners
+
+    Each submission is aborted by the process that owns it, on its
+    worker pool, so this only takes two pipelined round trips.
+
+    Args:
+        submission_ids (list): IDs of the submissions to abort
+
+    Returns:
+        list: removal status per submission, or None if not found
+    """
+    pipe = r.pipeline(transaction=False)
+    for submission_id in submission_ids:
+        pipe.exists(submission_id)
+    found = [
+        submission_id
+        for submission_id, exists in zip(submission_ids, pipe.execute())
+        if exists
+    ]
+
+    for submission_id in found:
+        pipe.hsetnx(submission_id, "abort", True)
+        pipe.publish(ABORT_CHANNEL, submission_id)
+    flagged = pipe.execute()[::2] if found else []
+
+    removals = {
+        submission_id: REMOVAL_INITIATED if is_new else REMOVAL_PENDING
+        for submission_id, is_new in zip(found, flagged)
+    }
+    return [removals.get(submission_id) for submission_id in submission_ids]
 
 
 @app.route(
@@ -0,0 +1,186 @@
+import logging
+import os
+import time
+import uuid
+
+POOL_PREFIX = "eec:pool:"
+POOL_IDLE = f"{POOL_PREFIX}idle"
+POOL_PENDING = f"{POOL_PREFIX}pending"
+
+POOL_MIN_SIZE = int(os.environ.get("EEC_POOL_MIN_SIZE", 0))
+POOL_MAX_SIZE = int(os.environ.get("EEC_POOL_MAX_SIZE", POOL_MIN_SIZE))
+POOL_IDLE_TTL = int(os.environ.get("EEC_POOL_IDLE_TTL", 3600))
+POOL_PROVISION_TIMEOUT = int(os.environ.get("EEC_POOL_PROVISION_TIMEOUT", 1800))
+
+log = logging.getLogger(__name__)
+
+# Pops the oldest idle node that has not outlived the idle TTL
+_TAKE = """
+local ids = redis.call("zrangebyscore", KEYS[1], ARGV[1], "+inf", "LIMIT", 0, 1)
+if ids[1] then
+    redis.call("zrem", KEYS[1], ids[1])
+    return ids[1]
+end
+return false
+"""
+
+# Drops provisioning slots started before ARGV[2], then reserves slots
+# for the tokens in ARGV[4..] until ARGV[1] nodes are idle or provisioning
+_RESERVE = """
+redis.call("zremrangebyscore", KEYS[2], "-inf", ARGV[2])
+local size = redis.call("zcard", KEYS[1]) + redis.call("zcard", KEYS[2])
+local reserved = {}
+for i = 4, #ARGV do
+    if size >= tonumber(ARGV[1]) then
+        break
+    end
+    redis.call("zadd", KEYS[2], ARGV[3], ARGV[i])
+    size = size + 1
+    table.insert(reserved, ARGV[i])
+end
+return reserved
+"""
+
+
+class WarmPool:
+    """Keeps idle MiCADO nodes ready to be handed out to new submissions
+
+    Idle nodes are kept in a sorted set scored by the time they were
+    created, next to a sorted set of the nodes being provisioned. Slots
+    are reserved and nodes are taken by Lua scripts, so any number of
+    processes may replenish and draw from the same pool.
+
+    `replenish` is meant to run on every supervisor tick: it destroys
+    nodes idle for longer than `idle_ttl` or above `max_size`, then starts
+    provisioning nodes until `min_size` are idle or on their way. Nodes
+    are provisioned on the worker pool of the `supervisor`, each holding
+    a slot of `admission` behind any queued submission, and destroyed on
+    its teardown pool.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        clients,
+        supervisor,
+        admission=None,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        idle_ttl=POOL_IDLE_TTL,
+        provision_timeout=POOL_PROVISION_TIMEOUT,
+    ):
+        self._redis = redis_client
+        self._clients = clients
+        self._supervisor = supervisor
+        self._admission = admission
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.idle_ttl = idle_ttl
+        self.provision_timeout = provision_timeout
+        self._take = redis_client.register_script(_TAKE)
+        self._reserve = redis_client.register_script(_RESERVE)
+
+    @property
+    def enabled(self):
+        return self.min_size > 0
+
+    def sizes(self):
+        """Returns the number of idle and provisioning nodes"""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zcard(POOL_IDLE)
+        pipe.zcard(POOL_PENDING)
+        idle, pending = pipe.execute()
+        return {
+            "idle": idle,
+            "provisioning": pending,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+        }
+
+    def take(self):
+        """Hands out an idle node, returns its MiCADO ID or None if empty"""
+        if not self.enabled:
+            return None
+        return self._take(keys=[POOL_IDLE], args=[time.time() - self.idle_ttl])
+
+    def replenish(self):
+        """Retires stale nodes and schedules provisioning of missing ones"""
+        for micado_id in self._claim_surplus():
+            self._supervisor.submit_teardown(self.destroy, micado_id)
+
+        if not self.enabled:
+            return []
+
+        now = time.time()
+        tokens = [uuid.uuid4().hex for _ in range(self.min_size)]
+        reserved = self._reserve(
+            keys=[POOL_IDLE, POOL_PENDING],
+            args=[self.min_size, now - self.provision_timeout, now, *tokens],
+        )
+        for i, token in enumerate(reserved):
+            if not self._take_slot(token):
+                self._redis.zrem(POOL_PENDING, *reserved[i:])
+                return reserved[:i]
+            self._supervisor.submit(self.provision, token)
+        return reserved
+
+    def provision(self, token):
+        """Creates a node and adds it to the idle set"""
+        try:
+            client = self._clients.new()
+            spec = self._clients.spec()
+            spec["name"] = f"MiCADO-pool-{token}"
+            micado_id = client.micado.create(**spec)
+        except Exception:
+            self._redis.zrem(POOL_PENDING, token)
+            raise
+        finally:
+            self._release_slot(token)
+        self._clients.keep(client)
+
+        pipe = self._redis.pipeline()
+        pipe.zrem(POOL_PENDING, token)
+        pipe.zadd(POOL_IDLE, time.time(), micado_id)
+        pipe.execute()
+        log.info(f"Provisioned warm MiCADO {micado_id}")
+        return micado_id
+
+    def destroy(self, micado_id):
+        """Removes a node that is no longer in the pool"""
+        self._clients.attached(micado_id).micado.destroy()
+        self._clients.forget(micado_id)
+        log.info(f"Destroyed warm MiCADO {micado_id}")
+
+    def _take_slot(self, token):
+        """Takes a provisioning slot, if no submission is queued for one
+
+        Slots are held under a lease, as the admission queue frees the
+        slots of holders without one.
+        """
+        if self._admission is None:
+            return True
+        if not self._supervisor.acquire(token):
+            return False
+        if self._admission.admit(token, priority=-1) is not None:
+            return True
+        self._release_slot(token)
+        return False
+
+    def _release_slot(self, token):
+        if self._admission is not None:
+            self._admission.release(token)
+            self._supervisor.release(token)
+            self._supervisor.admit_queued()
+
+    def _claim_surplus(self):
+        """Takes expired nodes, and any above max_size, out of the pool"""
+        expired = self._redis.zrangebyscore(
+            POOL_IDLE, "-inf", time.time() - self.idle_ttl
+        )
+        surplus = self._redis.zrange(POOL_IDLE, 0, -self.max_size - 1)
+
+        claimed = []
+        for micado_id in dict.fromkeys(expired + surplus):
+            if self._redis.zrem(POOL_IDLE, micado_id):
+                claimed.append(micado_id)
+        return claimed
@@ -0,0 +1,209 @@
+import redis
+
+from .lease import LEASE_PREFIX
+
+REGISTRY_PREFIX = "eec:"
+SUBMISSIONS = f"{REGISTRY_PREFIX}submissions"
+REFRESHED = f"{REGISTRY_PREFIX}refreshed"
+EXPIRING = f"{REGISTRY_PREFIX}expiring"
+STATUSES = f"{REGISTRY_PREFIX}statuses"
+STATUS_COUNTS = f"{REGISTRY_PREFIX}status_counts"
+REGISTRY_VERSION = f"{REGISTRY_PREFIX}registry_version"
+VERSION = 2
+
+INTERNAL_PREFIXES = (REGISTRY_PREFIX, LEASE_PREFIX)
+
+# Records the status of a submission, moving it between status counts
+_SET_STATUS = """
+local old = redis.call("hget", KEYS[1], ARGV[1])
+if old == ARGV[2] then
+    return 0
+end
+if old then
+    redis.call("hincrby", KEYS[2], old, -1)
+end
+redis.call("hset", KEYS[1], ARGV[1], ARGV[2])
+redis.call("hincrby", KEYS[2], ARGV[2], 1)
+return 1
+"""
+
+# Drops submissions from every index, and from the count of their status
+_REMOVE = """
+for _, id in ipairs(ARGV) do
+    local status = redis.call("hget", KEYS[4], id)
+    if status then
+        redis.call("hincrby", KEYS[5], status, -1)
+        redis.call("hdel", KEYS[4], id)
+    end
+end
+redis.call("zrem", KEYS[1], unpack(ARGV))
+redis.call("zrem", KEYS[2], unpack(ARGV))
+redis.call("zrem", KEYS[3], unpack(ARGV))
+"""
+
+
+class Registry:
+    """Indexes submissions so they can be found without scanning keys
+
+    Three sorted sets are kept next to the submission hashes:
+
+        eec:submissions: every submission, scored by its submit time
+        eec:refreshed: running submissions, scored by their last refresh
+        eec:expiring: ended submissions, scored by when their hash expires
+
+    as well as the status of each submission in eec:statuses, and the
+    number of submissions per status in eec:status_counts.
+
+    Entries are not expired with their hash. Ended submissions are
+    dropped by `remove_expired` once their hash has gone, and readers
+    prune any other IDs whose hash has gone.
+    """
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._set_status = redis_client.register_script(_SET_STATUS)
+        self._remove = redis_client.register_script(_REMOVE)
+
+    def add(self, thread_id, submit_time, client=None):
+        client = client or self._redis
+        client.execute_command("ZADD", SUBMISSIONS, "NX", submit_time, thread_id)
+
+    def refresh(self, thread_id, timestamp, client=None):
+        client = client or self._redis
+        client.zadd(REFRESHED, timestamp, thread_id)
+
+    def retire(self, thread_id, client=None):
+        """Marks a submission as no longer running"""
+        client = client or self._redis
+        client.zrem(REFRESHED, thread_id)
+
+    def expire(self, thread_id, expire_time, client=None):
+        """Schedules the removal of a submission whose hash will expire"""
+        client = client or self._redis
+        client.zadd(EXPIRING, expire_time, thread_id)
+
+    def set_status(self, thread_id, status, client=None):
+        """Records the status of a submission in the status counts"""
+        self._set_status(
+            keys=[STATUSES, STATUS_COUNTS], args=[thread_id, status], client=client
+        )
+
+    def status_counts(self):
+        """Returns the number of submissions per status"""
+        return {
+            int(status): int(count)
+            for status, count in self._redis.hgetall(STATUS_COUNTS).items()
+        }
+
+    def remove(self, *thread_ids):
+        if not thread_ids:
+            return
+        self._remove(
+            keys=[SUBMISSIONS, REFRESHED, EXPIRING, STATUSES, STATUS_COUNTS],
+            args=thread_ids,
+        )
+
+    def remove_expired(self, now):
+        """Drops submissions due to expire by `now` whose hash has gone
+
+        Submissions whose hash no longer expires are unscheduled, those
+        whose hash has yet to expire are checked again on the next call.
+
+        Returns:
+            list: IDs of the submissions removed
+        """
+        due = self._redis.zrangebyscore(EXPIRING, "-inf", now)
+        if not due:
+            return []
+        pipe = self._redis.pipeline(transaction=False)
+        for thread_id in due:
+            pipe.ttl(thread_id)
+        ttls = pipe.execute()
+
+        gone = [thread_id for thread_id, ttl in zip(due, ttls) if ttl == -2]
+        persisted = [thread_id for thread_id, ttl in zip(due, ttls) if ttl == -1]
+        self.remove(*gone)
+        if persisted:
+            self._redis.zrem(EXPIRING, *persisted)
+        return gone
+
+    def stale(self, before):
+        """Returns running submissions not refreshed since `before`"""
+        return self._redis.zrangebyscore(REFRESHED, "-inf", before)
+
+    def unrefreshed(self):
+        """Returns submissions that have never been refreshed"""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zrange(SUBMISSIONS, 0, -1)
+        pipe.zrange(REFRESHED, 0, -1)
+        submissions, refreshed = pipe.execute()
+        refreshed = set(refreshed)
+        return [thread_id for thread_id in submissions if thread_id not in refreshed]
+
+    def prune(self, thread_ids):
+        """Drops IDs whose hash has expired, returns the remaining ones"""
+        pipe = self._redis.pipeline(transaction=False)
+        for thread_id in thread_ids:
+            pipe.exists(thread_id)
+        exists = pipe.execute() if thread_ids else []
+
+        self.remove(*[
+            thread_id
+            for thread_id, found in zip(thread_ids, exists)
+            if not found
+        ])
+        return [thread_id for thread_id, found in zip(thread_ids, exists) if found]
+
+    def migrate(self, batch_size=1000):
+        """Builds the index from an existing database, once
+
+        An index of the first version, without status counts, only has
+        the status of its submissions indexed.
+
+        Returns:
+            int: the number of submissions indexed
+        """
+        version = int(self._redis.get(REGISTRY_VERSION) or 0)
+        if version >= VERSION:
+            return 0
+
+        if version:
+            keys = self._redis.zrange(SUBMISSIONS, 0, -1)
+        else:
+            keys = [
+                key
+                for key in self._redis.scan_iter(count=batch_size)
+                if not key.startswith(INTERNAL_PREFIXES)
+            ]
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            if not version:
+                self._index(batch)
+            self._index_statuses(batch)
+
+        self._redis.set(REGISTRY_VERSION, VERSION)
+        return len(keys)
+
+    def _index(self, keys):
+        pipe = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, "submit_time", "last_app_refresh")
+        try:
+            times = pipe.execute()
+        except redis.exceptions.ResponseError:
+            raise TypeError("Database corrupt - contains wrong data types.")
+
+        for key, (submit_time, updated) in zip(keys, times):
+            self.add(key, float(submit_time or 0), client=pipe)
+            if updated:
+                self.refresh(key, float(updated), client=pipe)
+        pipe.execute()
+
+    def _index_statuses(self, keys):
+        pipe = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hget(key, "status")
+        for key, status in zip(keys, pipe.execute()):
+            if status is not None:
+                self.set_status(key, status, client=pipe)
+        pipe.execute()
@@ -0,0 +1,130 @@
+import glob
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from urllib.parse import quote, unquote
+
+SPOOL_DIR = os.environ.get(
+    "EEC_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "micado_eec")
+)
+
+# quote() escapes "+" and never emits "%i", so submission prefixes end at
+# the first "+" and cannot clash with one another or with incoming uploads
+SEPARATOR = "+"
+INCOMING_PREFIX = f"%incoming{SEPARATOR}"
+PART_PREFIX = ".part."
+
+SpoolEntry = namedtuple("SpoolEntry", ["thread_id", "path", "mtime"])
+
+
+def _prefix(thread_id):
+    return f"{quote(thread_id, safe='')}{SEPARATOR}"
+
+
+def create(thread_id):
+    """Creates a spool directory for the files of a submission
+
+    Directory names start with the quoted submission ID, so concurrent
+    submissions with the same ID get their own directory.
+
+    Returns:
+        str: path to the new directory
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    return tempfile.mkdtemp(prefix=_prefix(thread_id), dir=SPOOL_DIR)
+
+
+def create_incoming():
+    """Creates a spool directory for an upload not yet tied to a submission
+
+    Returns:
+        str: path to the new directory
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    return tempfile.mkdtemp(prefix=INCOMING_PREFIX, dir=SPOOL_DIR)
+
+
+def create_part(spool_dir):
+    """Opens a new file for an uploaded part in a spool directory
+
+    Returns:
+        file object: binary file, kept on disk when closed
+    """
+    return tempfile.NamedTemporaryFile(
+        "wb+", prefix=PART_PREFIX, dir=spool_dir, delete=False
+    )
+
+
+def remove_parts(spool_dir):
+    """Removes uploaded parts left in a spool directory"""
+    pattern = os.path.join(glob.escape(spool_dir), glob.escape(PART_PREFIX))
+    for path in glob.glob(f"{pattern}*"):
+        os.remove(path)
+
+
+def claim(path, thread_id):
+    """Hands an incoming spool directory over to a submission
+
+    Files already open in the directory stay valid, only their path changes.
+
+    Returns:
+        str: new path to the directory
+    """
+    suffix = os.path.basename(path)[len(INCOMING_PREFIX):]
+    claimed = os.path.join(SPOOL_DIR, f"{_prefix(thread_id)}{suffix}")
+    os.rename(path, claimed)
+    return claimed
+
+
+def entries():
+    """Lists spool directories, with thread_id None for incoming uploads
+
+    The mtime of an incoming upload is that of its latest written part,
+    as parts being streamed to do not change the mtime of the directory.
+    """
+    found = []
+    for entry in os.scandir(SPOOL_DIR) if os.path.isdir(SPOOL_DIR) else []:
+        try:
+            if entry.name.startswith(INCOMING_PREFIX):
+                thread_id = None
+                mtime = _latest_mtime(entry)
+            else:
+                thread_id = unquote(entry.name.partition(SEPARATOR)[0])
+                mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        found.append(SpoolEntry(thread_id, entry.path, mtime))
+    return found
+
+
+def _latest_mtime(directory):
+    mtime = directory.stat().st_mtime
+    for entry in os.scandir(directory.path):
+        try:
+            mtime = max(mtime, entry.stat().st_mtime)
+        except OSError:
+            continue
+    return mtime
+
+
+def remove(thread_id):
+    """Removes every spool directory of a submission"""
+    pattern = os.path.join(glob.escape(SPOOL_DIR), glob.escape(_prefix(thread_id)))
+    for path in glob.glob(f"{pattern}*"):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def usage():
+    """Returns the number of submissions, files and bytes spooled to disk"""
+    submissions = files = size = 0
+    for entry in os.scandir(SPOOL_DIR) if os.path.isdir(SPOOL_DIR) else []:
+        submissions += 1
+        for root, _, names in os.walk(entry.path):
+            for name in names:
+                try:
+                    size += os.path.getsize(os.path.join(root, name))
+                    files += 1
+                except OSError:
+                    continue
+    return {"submissions": submissions, "files": files, "bytes": size}
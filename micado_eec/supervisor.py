@@ -0,0 +1,273 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+from .lease import Leases
+
+MAX_WORKERS = int(os.environ.get("EEC_MAX_WORKERS", 10))
+MAX_TEARDOWN_WORKERS = int(os.environ.get("EEC_MAX_TEARDOWN_WORKERS", 4))
+
+log = logging.getLogger(__name__)
+
+
+class AbortListener(threading.Thread):
+    """Delivers abort notifications published on a Redis channel
+
+    A single subscriber per process passes the ID of each aborted
+    submission to `callback`. The supervisor still polls the `abort`
+    field on every heartbeat, so a missed message only delays the abort.
+    """
+
+    def __init__(self, redis_client, channel, callback, retry_interval):
+        super().__init__(name="abort_listener", daemon=True)
+        self._redis = redis_client
+        self._channel = channel
+        self._callback = callback
+        self._retry_interval = retry_interval
+        self.subscribed = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                pubsub.subscribe(self._channel)
+                for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        self.subscribed.set()
+                    elif message["type"] == "message":
+                        self._callback(message["data"])
+            except redis.exceptions.ConnectionError:
+                self.subscribed.clear()
+                time.sleep(self._retry_interval)
+
+
+class Supervisor:
+    """Multiplexes the submissions handled by this process
+
+    Blocking MiCADO calls run as jobs on a bounded worker pool. Aborts and
+    other teardown jobs run on a pool of their own, so they never queue
+    behind builds that may take many minutes. Jobs that must wait for a
+    slot, such as builds queued for provisioning, are held by `queue`
+    without a worker until they are admitted. A single
+    timer thread renews the lease of every submission owned by this
+    process, refreshes the running ones in one pipelined round trip per
+    interval and schedules an abort job for any flagged for removal.
+    Tasks added with `add_task`, such as taking over submissions whose
+    owner has gone away, also run on every tick.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        registry,
+        channel,
+        interval,
+        max_workers=MAX_WORKERS,
+        max_teardown_workers=MAX_TEARDOWN_WORKERS,
+    ):
+        self._redis = redis_client
+        self.registry = registry
+        self._channel = channel
+        self.interval = interval
+        self.max_workers = max_workers
+        self.max_teardown_workers = max_teardown_workers
+        self.leases = Leases(redis_client, ttl=3 * interval)
+        self.tasks = []
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Drops threads and state that do not survive a fork"""
+        self._lock = threading.Lock()
+        self._executors = {}
+        self._timer = None
+        self.listener = None
+        self._owned = set()
+        self._watched = {}
+        self._queued = {}
+        self._admitting = threading.Lock()
+        self.leases.reset()
+
+    @property
+    def owned(self):
+        with self._lock:
+            return list(self._owned)
+
+    @property
+    def watched(self):
+        with self._lock:
+            return list(self._watched)
+
+    def acquire(self, thread_id):
+        """Takes ownership of a submission, returns False if owned elsewhere"""
+        if not self.leases.acquire(thread_id):
+            return False
+        with self._lock:
+            self._owned.add(thread_id)
+            self._start_timer()
+        return True
+
+    def add_task(self, task):
+        """Runs `task` on every tick, starting the timer if needed"""
+        with self._lock:
+            self.tasks.append(task)
+            self._start_timer()
+
+    def release(self, thread_id, linger=None):
+        """Stops driving a submission and gives up its lease"""
+        with self._lock:
+            self._owned.discard(thread_id)
+            self._watched.pop(thread_id, None)
+            self._queued.pop(thread_id, None)
+        self.leases.release(thread_id, linger)
+
+    def submit(self, job, *args, **kwargs):
+        """Schedules a job on the worker pool and returns its Future"""
+        return self._submit("micado_job", self.max_workers, job, args, kwargs)
+
+    def submit_teardown(self, job, *args, **kwargs):
+        """Schedules an abort or teardown job on the teardown pool"""
+        return self._submit(
+            "micado_teardown", self.max_teardown_workers, job, args, kwargs
+        )
+
+    def _submit(self, name, max_workers, job, args, kwargs):
+        with self._lock:
+            executor = self._executors.get(name)
+            if executor is None:
+                executor = self._executors[name] = ThreadPoolExecutor(
+                    max_workers, thread_name_prefix=name
+                )
+            future = executor.submit(job, *args, **kwargs)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def queue(self, thread_id, admit, job, abort):
+        """Holds the job of a submission until `admit()` returns True
+
+        Queued jobs are checked in the order they were queued, on every
+        tick and whenever `admit_queued` is called, and only the admitted
+        ones are scheduled on the worker pool. If the submission is
+        aborted meanwhile, `abort` is scheduled on the teardown pool.
+        """
+        with self._lock:
+            self._queued[thread_id] = (admit, job, abort)
+            self._start_timer()
+            self._start_listener()
+
+    @property
+    def queued(self):
+        with self._lock:
+            return list(self._queued)
+
+    def admit_queued(self):
+        """Schedules the queued jobs that are admitted, aborts flagged ones"""
+        if not self._admitting.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                queued = list(self._queued)
+            if not queued:
+                return
+
+            pipe = self._redis.pipeline(transaction=False)
+            for thread_id in queued:
+                pipe.hexists(thread_id, "abort")
+            for thread_id, is_aborted in zip(queued, pipe.execute()):
+                if is_aborted:
+                    self.abort(thread_id)
+                    continue
+                with self._lock:
+                    entry = self._queued.get(thread_id)
+                if entry and entry[0]():
+                    with self._lock:
+                        self._queued.pop(thread_id, None)
+                    self.submit(entry[1])
+        finally:
+            self._admitting.release()
+
+    def watch(self, handler):
+        """Keeps a running submission refreshed until it is aborted"""
+        with self._lock:
+            self._watched[handler.threadID] = handler
+            self._start_timer()
+            self._start_listener()
+        self.heartbeat([handler.threadID])
+
+    def abort(self, thread_id):
+        """Schedules the abort of a watched or queued submission, once"""
+        with self._lock:
+            handler = self._watched.pop(thread_id, None)
+            queued = self._queued.pop(thread_id, None)
+        if handler:
+            self.submit_teardown(handler.abort)
+        elif queued:
+            self.submit_teardown(queued[2])
+
+    def heartbeat(self, thread_ids=None):
+        """Refreshes last_app_refresh and polls for aborts, in one trip"""
+        thread_ids = self.watched if thread_ids is None else thread_ids
+        if not thread_ids:
+            return
+
+        now = time.time()
+        pipe = self._redis.pipeline(transaction=False)
+        for thread_id in thread_ids:
+            pipe.hset(thread_id, "last_app_refresh", now)
+            pipe.hexists(thread_id, "abort")
+            self.registry.refresh(thread_id, now, client=pipe)
+        aborted = pipe.execute()[1::3]
+
+        for thread_id, is_aborted in zip(thread_ids, aborted):
+            if is_aborted:
+                self.abort(thread_id)
+
+    def renew(self):
+        """Renews owned leases, dropping submissions taken over elsewhere"""
+        thread_ids = self.owned
+        if not thread_ids:
+            return
+
+        renewed = self.leases.renew(thread_ids)
+        with self._lock:
+            for thread_id, is_renewed in zip(thread_ids, renewed):
+                if not is_renewed:
+                    log.warning(f"Lost lease on {thread_id}")
+                    self._owned.discard(thread_id)
+                    self._watched.pop(thread_id, None)
+                    self._queued.pop(thread_id, None)
+
+    def _start_listener(self):
+        if self.listener is None:
+            self.listener = AbortListener(
+                self._redis, self._channel, self.abort, self.interval
+            )
+            self.listener.start()
+
+    def _start_timer(self):
+        if self._timer is None:
+            self._timer = threading.Thread(
+                target=self._run, name="supervisor", daemon=True
+            )
+            self._timer.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.renew()
+                self.heartbeat()
+                self.admit_queued()
+                for task in list(self.tasks):
+                    task()
+            except Exception:
+                log.exception("Supervisor tick failed")
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception():
+        log.error("Submission job failed", exc_info=future.exception())
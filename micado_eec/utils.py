@@ -1,19 +1,35 @@
 import io
 import json
+import logging
 import os
+import tempfile
+import threading
+import time
 import zipfile
-from base64 import b64decode, b16decode
+from base64 import b64decode
 
 import ruamel.yaml as yaml
 from Crypto.Cipher import PKCS1_v1_5 as Cipher_PKCS1_v1_5
 from Crypto.PublicKey import RSA
 
+from . import yaml_loader
+
 EEC_PRIV_KEY = os.environ.get("EEC_PRIV_KEY", "/etc/eec/eec.pem")
 
+TOSCA_META = "TOSCA-Metadata/TOSCA.meta"
+B64_CHUNK_SIZE = 4 * 2**20
+SPOOL_MAX_MEMORY = int(os.environ.get("EEC_SPOOL_MAX_MEMORY", 8 * 2**20))
+
+log = logging.getLogger(__name__)
+
+_ciphers = {}
+_cipher_lock = threading.Lock()
+
+
 def load_yaml_file(path):
     """Loads YAML data from file"""
     with open(path, "r") as file:
-        return yaml.safe_load(file)
+        return yaml_loader.load(file)
 
 
 def base64_to_yaml(base64_yaml):
@@ -27,7 +43,7 @@ def base64_to_yaml(base64_yaml):
     """
     try:
         decoded_string = b64decode(base64_yaml).decode("utf-8")
-        return yaml.safe_load(decoded_string)
+        return yaml_loader.load(decoded_string)
     except yaml.YAMLError:
         raise ValueError("Could not parse YAML")
     except ValueError:
@@ -37,13 +53,16 @@ def base64_to_yaml(base64_yaml):
 def file_to_json(file):
     """Transforms Flask file object to json
 
+    The JSON is read straight from the upload stream, which is spooled
+    to disk rather than held in memory until parsed.
+
     Args:
         file (werkzeug.FileStorage): File object
 
     Returns:
         dict: JSON data from file
     """
-    return json.loads(file.read().decode("utf-8"))
+    return json.load(file.stream)
 
 
 def is_valid_adt(adt):
@@ -71,38 +90,178 @@ def get_adt_inputs(adt):
     ]
 
 def get_csar_inputs(b64_csar):
+    """Returns the inputs of the TOSCA templates in a base64 encoded CSAR
+
+    The CSAR is decoded in chunks to a spool file. Only the entry
+    definitions named in TOSCA-Metadata/TOSCA.meta are parsed or, for
+    CSARs without one, every YAML file in the archive.
 
-    file_content = b64decode(b64_csar)
+    Args:
+        b64_csar (string): base64 representation of a CSAR
 
-    file_like_object = io.BytesIO(file_content)
-    zip_file = zipfile.ZipFile(file_like_object)
+    Returns:
+        list: inputs of the CSAR, as returned by get_adt_inputs
+    """
+    with b64decode_to_spool(b64_csar) as spool:
+        return read_csar_inputs(spool)
 
-    params = []
 
-    for file in zip_file.namelist():
+def read_csar_inputs(csar):
+    """Returns the inputs of the TOSCA templates in a decoded CSAR
 
-        if not file.endswith('.yaml') or file.startswith('__'):
-            continue
+    Args:
+        csar (str or file object): path to the CSAR, or the open CSAR
+
+    Returns:
+        list: inputs of the CSAR, as returned by get_adt_inputs
+    """
+    with zipfile.ZipFile(csar) as zip_file:
+        entry_definitions = get_csar_entry_definitions(zip_file)
+        if entry_definitions:
+            templates = [entry_definitions]
+        else:
+            templates = [
+                file
+                for file in zip_file.namelist()
+                if file.endswith(".yaml") and not file.startswith("__")
+            ]
 
-        yaml_file = zip_file.open(file)
-        adt = yaml.safe_load(yaml_file)
-        
-        params.extend(get_adt_inputs(adt))
+        params = []
+        for file in templates:
+            with zip_file.open(file) as yaml_file:
+                adt = yaml_loader.load(yaml_file)
+            params.extend(get_adt_inputs(adt))
 
     return params
 
+
+def get_csar_entry_definitions(zip_file):
+    """Returns the Entry-Definitions path from a CSAR's TOSCA.meta, if any"""
+    try:
+        meta = zip_file.read(TOSCA_META).decode("utf-8")
+    except KeyError:
+        return None
+
+    for line in meta.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() == "Entry-Definitions" and value.strip():
+            entry = value.strip()
+            return entry if entry in zip_file.namelist() else None
+    return None
+
+
+def b64decode_to_spool(b64_data, chunk_size=B64_CHUNK_SIZE):
+    """Decodes base64 data in chunks into a file object
+
+    Data that decodes to less than SPOOL_MAX_MEMORY bytes is kept in
+    memory, anything larger is written to a temporary file on disk.
+
+    Args:
+        b64_data (string): base64 representation of the data
+        chunk_size (int, optional): characters to decode at a time
+
+    Returns:
+        file object: the decoded data, positioned at the start
+    """
+    if len(b64_data) * 3 // 4 < SPOOL_MAX_MEMORY:
+        spool = io.BytesIO()
+    else:
+        spool = tempfile.TemporaryFile()
+
+    b64decode_to_file(b64_data, spool, chunk_size)
+    spool.seek(0)
+    return spool
+
+
+def b64decode_to_file(b64_data, file, chunk_size=B64_CHUNK_SIZE):
+    """Decodes base64 data in chunks, writing it to a binary file object
+
+    Whitespace in the data is ignored.
+
+    Args:
+        b64_data (string): base64 representation of the data
+        file (file object): binary file to write to
+        chunk_size (int, optional): characters to decode at a time
+    """
+    remainder = ""
+    for start in range(0, len(b64_data), chunk_size):
+        chunk = remainder + "".join(b64_data[start:start + chunk_size].split())
+        end = len(chunk) - len(chunk) % 4
+        file.write(b64decode(chunk[:end]))
+        remainder = chunk[end:]
+    file.write(b64decode(remainder))
+
+
 def decrypt_ciphertext(ciphertext):
+    """Decrypts a base64 ciphertext with the EEC private key"""
+    return decrypt_many([ciphertext])[0]
+
+
+def decrypt_many(ciphertexts):
+    """Decrypts base64 ciphertexts with the EEC private key
+
+    Args:
+        ciphertexts (list): base64 representations of the ciphertexts
+
+    Returns:
+        list: the plaintexts, in the same order
+    """
+    if not ciphertexts:
+        return []
+    cipher = get_cipher()
+    return [
+        cipher.decrypt(_ciphertext_bytes(ciphertext), None).decode()
+        for ciphertext in ciphertexts
+    ]
+
+
+def get_cipher(path=None):
+    """Returns a PKCS1 v1.5 cipher for the EEC private key
+
+    The key is imported once per process, and again only when the
+    modification time of the key file changes.
+    """
+    path = path or EEC_PRIV_KEY
+    mtime = os.stat(path).st_mtime_ns
+    with _cipher_lock:
+        cached = _ciphers.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path) as privkey:
+            private_key = RSA.importKey(b64decode(privkey.read()))
+        cipher = Cipher_PKCS1_v1_5.new(private_key)
+        _ciphers[path] = (mtime, cipher)
+        return cipher
+
 
+def _ciphertext_bytes(ciphertext):
     decode_data = b64decode(ciphertext)
 
+    # Restore a leading zero byte dropped by the encrypting side
     if len(decode_data) == 127:
-        hex_fixed = '00' + decode_data.hex()
-        decode_data = b16decode(hex_fixed.upper())
-    
-    with open(EEC_PRIV_KEY) as privkey:
-        other_private_key = RSA.importKey(b64decode(privkey.read()))
-    
-    cipher = Cipher_PKCS1_v1_5.new(other_private_key)
-    decrypt_text = cipher.decrypt(decode_data, None).decode()
-
-    return decrypt_text
+        decode_data = b"\0" + decode_data
+    return decode_data
+
+
+def retry(func, *args, attempts=3, backoff=1, max_backoff=60, sleep=time.sleep):
+    """Calls func, retrying with exponential backoff while it raises
+
+    Args:
+        func (callable): function to call with `args`
+        attempts (int, optional): calls to make before giving up
+        backoff (float, optional): seconds to wait after the first failure,
+            doubled after every further one, up to `max_backoff`
+
+    Returns:
+        the return value of func, or raises its last exception
+    """
+    for attempt in range(attempts):
+        try:
+            return func(*args)
+        except Exception as error:
+            if attempt + 1 >= attempts:
+                raise
+            delay = min(backoff * 2 ** attempt, max_backoff)
+            log.warning(f"{func.__name__} failed ({error}), retrying in {delay}s")
+            sleep(delay)
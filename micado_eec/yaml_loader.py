@@ -0,0 +1,60 @@
+import logging
+import os
+import re
+
+import ruamel.yaml as yaml
+
+try:
+    from . import _libyaml
+except ImportError:
+    _libyaml = None
+
+YAML_PARSER = os.environ.get("EEC_YAML_PARSER", "auto")
+
+# The libyaml loader resolves YAML 1.2 only, so documents that declare
+# their version are left to ruamel.yaml
+_VERSION_DIRECTIVE = re.compile(r"^%YAML\b", re.M)
+_VERSION_DIRECTIVE_BYTES = re.compile(rb"^%YAML\b", re.M)
+
+log = logging.getLogger(__name__)
+
+
+def load(stream):
+    """Loads YAML from a string or file, as `ruamel.yaml.safe_load` does
+
+    Documents are parsed by libyaml, through PyYAML, where it is
+    installed with its C extension. Otherwise, or with EEC_YAML_PARSER
+    set to "pure", they are parsed by ruamel.yaml in pure Python, as are
+    documents with a %YAML directive, e.g. `%YAML 1.1` where `yes` is a
+    bool.
+
+    Raises:
+        ruamel.yaml.YAMLError: if the document is not valid YAML
+    """
+    if hasattr(stream, "read"):
+        stream = stream.read()
+    if PARSER == "pure" or _declares_version(stream):
+        return yaml.safe_load(stream)
+    try:
+        return _libyaml.load(stream)
+    except _libyaml.YAMLError as error:
+        raise yaml.YAMLError(str(error)) from error
+
+
+def _declares_version(document):
+    if isinstance(document, bytes):
+        return _VERSION_DIRECTIVE_BYTES.search(document) is not None
+    return _VERSION_DIRECTIVE.search(document) is not None
+
+
+def _select_parser(requested):
+    available = _libyaml is not None
+    if requested == "pure" or (requested == "auto" and not available):
+        return "pure"
+    if not available:
+        log.warning("libyaml is not available, parsing YAML in pure Python")
+        return "pure"
+    return "libyaml"
+
+
+PARSER = _select_parser(YAML_PARSER)
@@ -0,0 +1,106 @@
+import functools
+import json
+import uuid
+
+import pytest
+import redis
+
+from micado_eec import handle_micado
+from micado_eec.clients import ClientFactory
+from micado_eec.fake import FakeMicadoClient, FAKE_NODES
+from micado_eec.handle_micado import HandleMicado, events_key, r, registry, supervisor
+
+TEST_DB = 1
+
+
+def pytest_configure(config):
+    """Points the Redis client of the EEC at the test database
+
+    Every module-level user of the client, such as the registry, the
+    supervisor and the metrics, goes through its connection pool. This
+    runs before test modules are collected, so before micado_eec.micado
+    is imported and indexes or resumes anything.
+    """
+    r.connection_pool = redis.ConnectionPool(
+        host="redis", db=TEST_DB, decode_responses=True
+    )
+
+
+@pytest.fixture(autouse=True)
+def db():
+    """The test database, emptied before and after each test"""
+    client = redis.StrictRedis("redis", db=TEST_DB, decode_responses=True)
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+@pytest.fixture
+def client():
+    from micado_eec.micado import app
+
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def submission_id():
+    """A submission hash with a status and details, but no handler"""
+    submission_id = f"test-{uuid.uuid4()}"
+    r.hmset(
+        submission_id,
+        {"status": 1, "details": "ZGV0YWlscw==", "only_status": True, "submit_time": 0},
+    )
+    yield submission_id
+    r.delete(submission_id)
+
+
+@pytest.fixture
+def clients(tmp_path, db, monkeypatch):
+    """Clients of the fake launcher, keeping their nodes in `db`"""
+    spec_path = tmp_path / "micado_spec.yaml"
+    spec_path.write_text("properties: {flavor: small}")
+    clients = ClientFactory(
+        "fake",
+        "ansible",
+        str(spec_path),
+        load_spec=handle_micado._load_micado_spec,
+        client_class=functools.partial(FakeMicadoClient, redis_client=db),
+    )
+    monkeypatch.setattr(handle_micado, "clients", clients)
+    return clients
+
+
+@pytest.fixture
+def cloud(db):
+    """Returns the specs of the fake MiCADO nodes in `db`, by node ID"""
+
+    def nodes():
+        return {
+            micado_id: json.loads(spec)
+            for micado_id, spec in db.hgetall(FAKE_NODES).items()
+        }
+
+    return nodes
+
+
+@pytest.fixture
+def new_handler():
+    """Creates submission handlers, removing their records after the test"""
+    thread_ids = []
+
+    def new_handler(*args, **kwargs):
+        thread_id = f"test-{uuid.uuid4()}"
+        thread_ids.append(thread_id)
+        return HandleMicado(thread_id, f"process_{thread_id}", *args, **kwargs)
+
+    yield new_handler
+    for thread_id in thread_ids:
+        supervisor.release(thread_id)
+        r.delete(thread_id, events_key(thread_id))
+        registry.remove(thread_id)
+
+
+@pytest.fixture
+def handler(new_handler):
+    return new_handler()
@@ -0,0 +1,109 @@
+from micado_eec import handle_micado
+from micado_eec.admission import AdmissionQueue, ACTIVE, waiting_key
+from micado_eec.handle_micado import (
+    HandleMicado,
+    r,
+    supervisor,
+    STATUS_INFRA_QUEUED,
+)
+from micado_eec.lease import lease_key
+
+
+def make_queue(db, cloud="openstack", **caps):
+    caps = {"max_active": 2, "max_per_cloud": 2, **caps}
+    return AdmissionQueue(db, cloud, **caps)
+
+
+def leased(db, *thread_ids):
+    for thread_id in thread_ids:
+        db.set(lease_key(thread_id), "owner")
+    return thread_ids
+
+
+def test_admits_up_to_the_global_cap(db):
+    queue = make_queue(db)
+    first, second, third = leased(db, "first", "second", "third")
+    assert queue.admit(first) is not None
+    assert queue.admit(second) is not None
+    assert queue.admit(third) is None
+
+    queue.release(first)
+    assert queue.admit(third) is not None
+
+
+def test_admits_in_order(db):
+    queue = make_queue(db, max_active=1)
+    holder, early, late = leased(db, "holder", "early", "late")
+    queue.admit(holder)
+    assert queue.admit(early) is None
+    assert queue.admit(late) is None
+
+    queue.release(holder)
+    assert queue.admit(late) is None
+    assert queue.admit(early) is not None
+
+
+def test_priority_jumps_the_queue(db):
+    queue = make_queue(db, max_active=1)
+    holder, normal, urgent = leased(db, "holder", "normal", "urgent")
+    queue.admit(holder)
+    queue.admit(normal)
+    queue.admit(urgent, priority=1)
+
+    queue.release(holder)
+    assert queue.admit(normal) is None
+    assert queue.admit(urgent, priority=1) is not None
+
+
+def test_per_cloud_cap(db):
+    openstack = make_queue(db, "openstack", max_active=3, max_per_cloud=1)
+    ec2 = make_queue(db, "ec2", max_active=3, max_per_cloud=1)
+    first, second, third = leased(db, "first", "second", "third")
+    assert openstack.admit(first) is not None
+    assert openstack.admit(second) is None
+    assert ec2.admit(third) is not None
+
+
+def test_submissions_without_lease_are_dropped(db):
+    queue = make_queue(db, max_active=1)
+    holder, waiting = leased(db, "holder", "waiting")
+    queue.admit(holder)
+    queue.admit("gone")
+    assert queue.admit(waiting) is None
+
+    db.delete(lease_key(holder))
+    assert queue.admit(waiting) is not None
+    assert db.zrange(waiting_key("openstack"), 0, -1) == []
+    assert db.zrange(ACTIVE, 0, -1) == ["openstack|waiting"]
+
+
+def test_stats(db):
+    queue = make_queue(db, max_active=1)
+    holder, waiting = leased(db, "holder", "waiting")
+    queue.admit(holder)
+    queue.admit(waiting)
+
+    stats = queue.stats()
+    assert stats["waiting"] == {"openstack": 1}
+    assert stats["provisioning"] == {"openstack": 1}
+    assert stats["admitted"] == 1
+    assert stats["oldest_wait_seconds"] >= 0
+
+
+def test_submission_aborted_while_queued(db, handler, monkeypatch):
+    monkeypatch.setattr(handle_micado, "admission", make_queue(db, max_active=0))
+    monkeypatch.setattr(handle_micado.pool, "take", lambda: None)
+    aborted = []
+    monkeypatch.setattr(HandleMicado, "abort", lambda self: aborted.append(self))
+    monkeypatch.setattr(supervisor, "submit_teardown", lambda job: job())
+
+    assert handler.start()
+    assert r.hget(handler.threadID, "status_detail") == STATUS_INFRA_QUEUED
+    assert handler.threadID in supervisor.queued
+    assert db.zcard(waiting_key("openstack")) == 1
+
+    r.hset(handler.threadID, "abort", "True")
+    supervisor.admit_queued()
+    assert handler.threadID not in supervisor.queued
+    assert aborted == [handler]
+    assert db.zcard(waiting_key("openstack")) == 0
@@ -0,0 +1,55 @@
+import pytest
+
+from micado_eec.cache import ContentCache, content_key
+
+
+def test_content_key_includes_qualifiers():
+    assert content_key("abc") == content_key("abc")
+    assert content_key("abc", True) != content_key("abc", False)
+
+
+def test_hits_and_misses():
+    cache = ContentCache("test", max_bytes=1024)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"parsed": True}
+
+    assert cache.get_or_compute("key", compute) == {"parsed": True}
+    assert cache.get_or_compute("key", compute) == {"parsed": True}
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = ContentCache("test", max_bytes=10, sizeof=lambda value: 4)
+    cache.get_or_compute("a", lambda: "a")
+    cache.get_or_compute("b", lambda: "b")
+    cache.get_or_compute("a", lambda: "a")
+    cache.get_or_compute("c", lambda: "c")
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 8
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+
+def test_errors_are_not_cached():
+    cache = ContentCache("test", max_bytes=1024)
+
+    def fail():
+        raise ValueError("Could not parse YAML")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("key", fail)
+    assert cache.get_or_compute("key", lambda: "parsed") == "parsed"
+
+
+def test_values_are_shared_through_redis(db):
+    first = ContentCache("test", max_bytes=1024, redis_client=db, ttl=60)
+    second = ContentCache("test", max_bytes=1024, redis_client=db, ttl=60)
+
+    first.get_or_compute("key", lambda: [[], [], [{"key": "test"}]])
+    assert second.get_or_compute("key", lambda: None) == [[], [], [{"key": "test"}]]
+    assert second.stats()["shared_hits"] == 1
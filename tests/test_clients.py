@@ -0,0 +1,74 @@
+import functools
+import os
+
+import pytest
+
+from micado_eec.clients import ClientFactory
+from micado_eec.fake import FakeMicadoClient
+
+
+@pytest.fixture
+def spec_path(tmp_path):
+    path = tmp_path / "micado_spec.yaml"
+    path.write_text("v1")
+    return path
+
+
+@pytest.fixture
+def clients(spec_path, db):
+    loads = []
+
+    def load_spec(path):
+        loads.append(path)
+        with open(path) as file:
+            return {"version": file.read()}
+
+    clients = ClientFactory(
+        "openstack",
+        "ansible",
+        str(spec_path),
+        load_spec,
+        client_class=functools.partial(FakeMicadoClient, redis_client=db),
+        max_attached=2,
+    )
+    clients.loads = loads
+    return clients
+
+
+def test_spec_is_parsed_once_per_change(clients, spec_path):
+    spec = clients.spec()
+    spec["name"] = "changed by caller"
+    assert clients.spec() == {"version": "v1"}
+    assert len(clients.loads) == 1
+
+    spec_path.write_text("v2")
+    os.utime(spec_path, ns=(0, 0))
+    assert clients.spec() == {"version": "v2"}
+    assert len(clients.loads) == 2
+
+
+@pytest.fixture
+def nodes(clients):
+    return [clients.new().micado.create() for _ in range(3)]
+
+
+def test_attached_clients_are_reused(clients, nodes):
+    client = clients.attached(nodes[0])
+    assert (client.launcher, client.installer) == ("openstack", "ansible")
+    assert client.micado.micado_id == nodes[0]
+    assert clients.attached(nodes[0]) is client
+
+    clients.forget(nodes[0])
+    assert clients.attached(nodes[0]) is not client
+
+
+def test_attached_clients_are_bounded(clients, nodes):
+    first = clients.attached(nodes[0])
+    clients.attached(nodes[1])
+    clients.attached(nodes[2])
+    assert clients.attached(nodes[0]) is not first
+
+
+def test_handler_builds_client_lazily(handler):
+    assert handler._micado is None
+    assert handler.micado is handler.micado
@@ -0,0 +1,51 @@
+import functools
+
+import pytest
+
+from micado_eec.clients import ClientFactory
+from micado_eec.fake import FakeLauncherError, FakeMicadoClient, FAKE_NODES, apps_key
+from micado_eec.handle_micado import (
+    r,
+    supervisor,
+    STATUS_ERROR,
+    STATUS_RUNNING,
+    STATUS_INFRA_REMOVED,
+)
+
+
+@pytest.fixture
+def handler(new_handler):
+    handler = new_handler(
+        artefact_data={"downloadUrl": "adt.yaml", "downloadUrl_content": ""}
+    )
+    supervisor.acquire(handler.threadID)
+    handler._get_adt = lambda: {"topology_template": {}}
+    return handler
+
+
+def test_fake_is_the_client_of_the_fake_launcher():
+    clients = ClientFactory("fake", "ansible", "spec.yaml", load_spec=None)
+    assert isinstance(clients.new(), FakeMicadoClient)
+
+
+def test_submission_runs_and_is_removed_on_fake(db, clients, handler):
+    handler.run()
+    micado_id = r.hget(handler.threadID, "micado_id")
+    assert r.hget(handler.threadID, "status") == str(STATUS_RUNNING)
+    assert db.hexists(FAKE_NODES, micado_id)
+    assert db.scard(apps_key(micado_id)) == 1
+
+    handler.abort()
+    assert r.hget(handler.threadID, "status_detail") == STATUS_INFRA_REMOVED
+    assert not db.hexists(FAKE_NODES, micado_id)
+    assert not db.exists(apps_key(micado_id))
+
+
+def test_fake_launcher_failures(db, clients, handler):
+    clients._client_class = functools.partial(
+        FakeMicadoClient, redis_client=db, failure_rate=1
+    )
+    with pytest.raises(FakeLauncherError):
+        handler.run()
+    assert r.hget(handler.threadID, "status") == str(STATUS_ERROR)
+    assert not db.exists(FAKE_NODES)
@@ -0,0 +1,224 @@
+import json
+import threading
+import time
+import types
+
+import pytest
+
+from micado_eec import micado
+from micado_eec.handle_micado import (
+    HandleMicado,
+    MicadoBuildException,
+    events_key,
+    r,
+    ABORT_CHANNEL,
+    STATUS_INIT,
+    STATUS_ERROR,
+    STATUS_INFRA_INIT,
+    STATUS_INFRA_BUILD,
+    STATUS_APP_READY,
+    STATUS_APP_REMOVED,
+)
+from micado_eec.registry import EXPIRING, SUBMISSIONS
+
+
+def test_remove_submission_publishes_abort(client, submission_id):
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(ABORT_CHANNEL)
+    rv = client.delete(f"micado_eec/submissions/{submission_id}")
+    assert rv.status_code == 200
+    assert r.hexists(submission_id, "abort")
+    messages = [pubsub.get_message(timeout=1) for _ in range(2)]
+    assert submission_id in [message["data"] for message in messages if message]
+
+    rv = client.delete(f"micado_eec/submissions/{submission_id}")
+    assert rv.status_code == 202
+
+
+def test_remove_many_submissions(client, submission_id):
+    r.hset(f"{submission_id}-aborting", "abort", True)
+    ids = [submission_id, f"{submission_id}-aborting", f"{submission_id}-missing"]
+    try:
+        rv = client.delete("micado_eec/submissions", json={"ids": ids})
+        assert rv.status_code == 200
+        assert rv.json["submissions"] == {
+            ids[0]: micado.REMOVAL_INITIATED,
+            ids[1]: micado.REMOVAL_PENDING,
+            ids[2]: None,
+        }
+        assert r.hexists(submission_id, "abort")
+        assert not r.exists(ids[2])
+    finally:
+        r.delete(ids[1])
+
+    rv = client.delete("micado_eec/submissions")
+    assert rv.status_code == 400
+    for body in (ids, {"ids": [{"id": submission_id}]}):
+        rv = client.delete("micado_eec/submissions", json=body)
+        assert rv.status_code == 400
+
+
+def test_new_submission_is_recorded_and_indexed(handler):
+    submission = r.hgetall(handler.threadID)
+    assert submission["status"] == str(STATUS_INIT)
+    assert submission["only_status"] == "True"
+    assert submission["status_detail"] == STATUS_INFRA_INIT
+    assert "details" not in submission
+    assert float(submission["submit_time"]) > 0
+    assert r.zscore(SUBMISSIONS, handler.threadID) == float(submission["submit_time"])
+
+
+def test_set_status_can_expire_submission(handler):
+    handler.status = STATUS_ERROR
+    handler.set_status(expire=90)
+    assert r.hget(handler.threadID, "status") == str(STATUS_ERROR)
+    assert r.hget(handler.threadID, "version") == "2"
+    assert 0 < r.ttl(handler.threadID) <= 90
+    assert r.zscore(EXPIRING, handler.threadID) <= time.time() + 90
+
+
+def test_status_transitions_are_streamed(client, handler, monkeypatch):
+    monkeypatch.setattr(micado, "MAX_WAIT_SECONDS", 0.5)
+    handler.status_detail = STATUS_INFRA_BUILD
+    handler.set_status()
+
+    rv = client.get(f"micado_eec/submissions/{handler.threadID}/events")
+    assert rv.mimetype == "text/event-stream"
+    events = [
+        json.loads(line[len("data: "):])
+        for line in rv.get_data(as_text=True).splitlines()
+        if line.startswith("data: ")
+    ]
+    assert [event["detail"] for event in events] == [
+        STATUS_INFRA_INIT,
+        STATUS_INFRA_BUILD,
+    ]
+
+
+def test_event_streams_are_capped(client, handler, monkeypatch):
+    monkeypatch.setattr(micado, "MAX_WAIT_SECONDS", 0.1)
+    monkeypatch.setattr(micado, "_event_streams", threading.BoundedSemaphore(1))
+    url = f"micado_eec/submissions/{handler.threadID}/events"
+
+    rv = client.get(url, buffered=False)
+    assert client.get(url).status_code == 503
+    rv.close()
+    assert client.get(url).status_code == 200
+
+
+def test_events_resume_after_last_event_id(client, handler, monkeypatch):
+    monkeypatch.setattr(micado, "MAX_WAIT_SECONDS", 0.5)
+    first_id = r.execute_command("XRANGE", events_key(handler.threadID), "-", "+")[0][0]
+    handler.status_detail = STATUS_INFRA_BUILD
+    handler.set_status()
+
+    rv = client.get(
+        f"micado_eec/submissions/{handler.threadID}/events",
+        headers={"Last-Event-ID": first_id},
+    )
+    assert rv.get_data(as_text=True).count("event: status") == 1
+
+
+def test_transitions_are_traced(client, handler):
+    for detail in (STATUS_INFRA_BUILD, STATUS_INFRA_BUILD, STATUS_APP_READY):
+        handler.status_detail = detail
+        handler.set_status()
+    handler.status = STATUS_ERROR
+    handler.status_detail = "quota exceeded"
+    handler.set_status()
+
+    rv = client.get(f"micado_eec/submissions/{handler.threadID}/usage_info")
+    trace = rv.json["trace"]
+    assert [phase["phase"] for phase in trace] == [
+        "infra_init",
+        "infra_build",
+        "app_ready",
+        "error",
+    ]
+    assert trace[0]["end"] == trace[1]["start"]
+    assert trace[-1]["end"] is None
+    assert trace[-1]["error"] == "quota exceeded"
+    assert rv.json["time_to_running_seconds"] == round(
+        trace[2]["start"] - trace[0]["start"], 3
+    )
+
+
+def test_resumed_submission_extends_trace(handler):
+    handler.status_detail = STATUS_APP_READY
+    handler.set_status()
+
+    resumed = HandleMicado(handler.threadID, handler.name)
+    resumed.status_detail = STATUS_APP_READY
+    resumed.set_status()
+    resumed.status_detail = STATUS_APP_REMOVED
+    resumed.set_status()
+
+    trace = json.loads(r.hget(handler.threadID, "trace"))
+    assert [entry[0] for entry in trace] == ["infra_init", "app_ready", "app_removed"]
+
+
+@pytest.fixture
+def parametrised(new_handler):
+    return new_handler(
+        artefact_data={"salt": "salt"},
+        inouts={
+            "parameters": [
+                {"key": "size", "value": "10"},
+                {"key": "password", "value": "ciphertext"},
+                {"key": "unknown", "value": "x"},
+            ],
+            "free_inputs": [{"id": "in"}, {"id": "twice"}, {"id": "twice"}],
+        },
+        parameters=[
+            {"key": "size", "type": "integer"},
+            {"key": "password", "type": "secret"},
+        ],
+    )
+
+
+def test_load_params_validates_and_decrypts(parametrised, monkeypatch):
+    monkeypatch.setattr(
+        "micado_eec.handle_micado.decrypt_many",
+        lambda ciphertexts: [text.upper() for text in ciphertexts],
+    )
+    parameters = parametrised._load_params()
+    assert parameters["size"] == "10"
+    assert parameters["password"] == "CIPHERTEXT"
+    assert parameters["EMG_SALT"] == "salt"
+    assert "unknown" not in parameters
+
+
+def test_is_valid_input(parametrised):
+    assert parametrised._is_valid_input({"id": "in"})
+    assert not parametrised._is_valid_input({"id": "twice"})
+    assert not parametrised._is_valid_input({"id": "missing"})
+    with pytest.raises(MicadoBuildException):
+        parametrised._is_valid_input({})
+
+
+class Applications:
+    """Stands in for micado.applications, failing each deletion once"""
+
+    def __init__(self, app_ids):
+        self.app_ids = app_ids
+        self.calls = []
+
+    def list(self):
+        return [type("App", (), {"id": app_id}) for app_id in self.app_ids]
+
+    def delete(self, app_id):
+        self.calls.append(app_id)
+        if self.calls.count(app_id) == 1:
+            raise ConnectionError(app_id)
+
+
+def test_delete_app_retries_each_deletion(handler, monkeypatch):
+    monkeypatch.setattr("micado_eec.handle_micado.TEARDOWN_BACKOFF", 0)
+    handler.micado = types.SimpleNamespace(
+        applications=Applications(["one", "two", "three"])
+    )
+    handler._delete_app()
+    assert sorted(handler.micado.applications.calls) == sorted(
+        ["one", "two", "three"] * 2
+    )
+    assert r.hget(handler.threadID, "status_detail") == STATUS_APP_REMOVED
@@ -0,0 +1,96 @@
+from micado_eec import handle_micado
+from micado_eec.handle_micado import (
+    registry,
+    STATUS_ERROR,
+    STATUS_INIT,
+    STATUS_INFRA_BUILD,
+)
+from micado_eec.metrics import Metrics
+from micado_eec.micado import app
+
+
+def worker(db):
+    metrics = Metrics(db)
+    metrics.counter("jobs_total", "Jobs done")
+    metrics.histogram("job_seconds", "Job duration", (1, 10))
+    return metrics
+
+
+def test_workers_add_up(db):
+    first, second = worker(db), worker(db)
+    first.inc("jobs_total", {"kind": "a"})
+    second.inc("jobs_total", {"kind": "a"}, 2)
+    first.observe("job_seconds", 0.5)
+    second.observe("job_seconds", 5)
+    second.observe("job_seconds", 50)
+    first.flush()
+    second.flush()
+
+    assert first.render().splitlines() == [
+        "# HELP job_seconds Job duration",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="1"} 1',
+        'job_seconds_bucket{le="10"} 2',
+        'job_seconds_bucket{le="+Inf"} 3',
+        "job_seconds_sum 55.5",
+        "job_seconds_count 3",
+        "# HELP jobs_total Jobs done",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="a"} 3',
+    ]
+
+
+def test_render_gauge_escapes_labels():
+    assert Metrics.render_gauge("up", "Up", [({"name": 'a"b'}, 1)]).splitlines() == [
+        "# HELP up Up",
+        "# TYPE up gauge",
+        'up{name="a\\"b"} 1',
+    ]
+
+
+def test_phases_and_errors_are_recorded(db, handler, monkeypatch):
+    monkeypatch.setattr(handle_micado, "metrics", worker(db))
+    handle_micado.metrics.histogram("eec_phase_duration_seconds", "", (1,))
+    handle_micado.metrics.counter("eec_submission_errors_total", "")
+
+    handler.status_detail = STATUS_INFRA_BUILD
+    handler.set_status()
+    handler.status = STATUS_ERROR
+    handler.status_detail = "failed"
+    handler.set_status()
+    handler.set_status()
+    handle_micado.metrics.flush()
+
+    text = handle_micado.metrics.render()
+    assert 'eec_phase_duration_seconds_count{phase="infra_init"} 1' in text
+    assert 'eec_phase_duration_seconds_count{phase="infra_build"} 1' in text
+    assert "eec_submission_errors_total 1" in text
+
+
+def test_submissions_are_counted_per_status(client, handler):
+    handler.status = STATUS_ERROR
+    handler.set_status()
+    assert registry.status_counts() == {STATUS_INIT: 0, STATUS_ERROR: 1}
+    text = client.get("/micado_eec/metrics").get_data(as_text=True)
+    assert 'eec_submissions{status="init"} 0' in text
+    assert 'eec_submissions{status="error"} 1' in text
+
+    registry.remove(handler.threadID)
+    assert registry.status_counts() == {STATUS_INIT: 0, STATUS_ERROR: 0}
+
+
+def test_metrics_endpoint():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        client.get("/micado_eec/health")
+        rv = client.get("/micado_eec/metrics")
+
+    assert rv.status_code == 200
+    assert rv.mimetype == "text/plain"
+    text = rv.get_data(as_text=True)
+    assert (
+        'eec_request_duration_seconds_count{method="GET",route="/micado_eec/health"}'
+        in text
+    )
+    assert 'eec_submissions{status="running"}' in text
+    assert "eec_redis_ping_seconds" in text
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+from micado_eec import handle_micado
+from micado_eec.admission import AdmissionQueue
+from micado_eec.handle_micado import r, STATUS_INFRA_WARM
+from micado_eec.lease import lease_key
+from micado_eec.pool import WarmPool, POOL_IDLE, POOL_PENDING
+
+
+class Jobs:
+    """Stands in for the supervisor, running or recording pool jobs"""
+
+    def __init__(self, db=None, run=True):
+        self.db = db
+        self.run = run
+        self.jobs = []
+
+    def submit(self, job, *args):
+        self.jobs.append(args)
+        if self.run:
+            job(*args)
+
+    submit_teardown = submit
+
+    def acquire(self, token):
+        if self.db is not None:
+            self.db.set(lease_key(token), "pool")
+        return True
+
+    def release(self, token):
+        if self.db is not None:
+            self.db.delete(lease_key(token))
+
+    def admit_queued(self):
+        pass
+
+
+def make_pool(db, clients, supervisor=None, admission=None, **sizes):
+    sizes = {"min_size": 2, "max_size": 3, **sizes}
+    return WarmPool(db, clients, supervisor or Jobs(), admission, **sizes)
+
+
+def test_replenish_provisions_up_to_min_size(db, clients, cloud):
+    pool = make_pool(db, clients)
+    assert len(pool.replenish()) == 2
+    assert pool.replenish() == []
+    assert db.zcard(POOL_IDLE) == 2
+    assert all(spec["name"].startswith("MiCADO-pool-") for spec in cloud().values())
+
+
+def test_replenish_counts_nodes_being_provisioned(db, clients):
+    jobs = Jobs(run=False)
+    make_pool(db, clients, jobs).replenish()
+    make_pool(db, clients, jobs).replenish()
+    assert len(jobs.jobs) == 2
+    assert db.zcard(POOL_PENDING) == 2
+
+
+def test_provisioning_takes_slots_behind_submissions(db, clients):
+    jobs = Jobs(db, run=False)
+    admission = AdmissionQueue(db, "openstack", max_active=1, max_per_cloud=1)
+    pool = make_pool(db, clients, jobs, admission, min_size=1)
+    for thread_id in ("holder", "queued"):
+        db.set(lease_key(thread_id), "owner")
+    assert admission.admit("holder") is not None
+    assert admission.admit("queued") is None
+
+    assert pool.replenish() == []
+    admission.release("holder")
+    assert pool.replenish() == []
+    assert db.zcard(POOL_PENDING) == 0
+
+    assert admission.admit("queued") is not None
+    admission.release("queued")
+    assert len(pool.replenish()) == 1
+    assert len(jobs.jobs) == 1
+    assert db.zcard(POOL_PENDING) == 1
+
+
+def test_failed_provisioning_frees_its_slot(db, clients):
+    pool = make_pool(db, clients, min_size=1)
+    pool._clients._load_spec = lambda path: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        pool.replenish()
+    assert db.zcard(POOL_PENDING) == 0
+
+
+def test_take_hands_out_each_node_once(db, clients):
+    pool = make_pool(db, clients)
+    db.zadd(POOL_IDLE, time.time() - 10, "old")
+    db.zadd(POOL_IDLE, time.time(), "new")
+    assert [pool.take(), pool.take(), pool.take()] == ["old", "new", None]
+
+
+def test_take_skips_expired_nodes(db, clients):
+    pool = make_pool(db, clients, idle_ttl=60)
+    db.zadd(POOL_IDLE, time.time() - 120, "expired")
+    assert pool.take() is None
+
+
+def test_replenish_destroys_expired_and_surplus_nodes(db, clients, cloud):
+    pool = make_pool(db, clients, min_size=1, max_size=1, idle_ttl=60)
+    ids = [clients.new().micado.create() for _ in range(3)]
+    db.zadd(POOL_IDLE, time.time() - 120, ids[0])
+    db.zadd(POOL_IDLE, time.time() - 10, ids[1])
+    db.zadd(POOL_IDLE, time.time(), ids[2])
+
+    assert pool.replenish() == []
+    assert list(cloud()) == [ids[2]]
+    assert db.zrange(POOL_IDLE, 0, -1) == [ids[2]]
+
+
+def test_submission_takes_warm_node(db, clients, cloud, handler, monkeypatch):
+    monkeypatch.setattr(handle_micado, "pool", make_pool(db, clients, min_size=1))
+    handle_micado.pool.replenish()
+    [warm_id] = cloud()
+
+    handler._warm_id = handle_micado.pool.take()
+    handler._create_micado_node({"name": f"MiCADO-{handler.threadID}"})
+    assert r.hget(handler.threadID, "micado_id") == warm_id
+    assert r.hget(handler.threadID, "status_detail") == STATUS_INFRA_WARM
+    assert warm_id in r.hget(handler.threadID, "login_info")
+    assert list(cloud()) == [warm_id]
+
+
+def test_submission_builds_node_when_pool_is_empty(
+    db, clients, cloud, handler, monkeypatch
+):
+    monkeypatch.setattr(handle_micado, "pool", make_pool(db, clients, min_size=1))
+
+    handler._warm_id = handle_micado.pool.take()
+    handler._create_micado_node({"name": f"MiCADO-{handler.threadID}"})
+    [micado_id] = cloud()
+    assert cloud()[micado_id] == {"name": f"MiCADO-{handler.threadID}"}
+    assert r.hget(handler.threadID, "micado_id") == micado_id
@@ -0,0 +1,99 @@
+import pytest
+
+from micado_eec.registry import (
+    Registry,
+    SUBMISSIONS,
+    REFRESHED,
+    EXPIRING,
+    REGISTRY_VERSION,
+)
+
+
+@pytest.fixture
+def registry(db):
+    return Registry(db)
+
+
+def test_migrate_indexes_existing_submissions(db, registry):
+    db.hset("building", "submit_time", 10)
+    db.hset("running", "submit_time", 20)
+    db.hset("running", "last_app_refresh", 30)
+    db.set("lease:running", "owner")
+
+    assert registry.migrate() == 2
+    assert db.zrange(SUBMISSIONS, 0, -1, withscores=True) == [
+        ("building", 10.0),
+        ("running", 20.0),
+    ]
+    assert db.zrange(REFRESHED, 0, -1, withscores=True) == [("running", 30.0)]
+    assert registry.status_counts() == {}
+    assert registry.migrate() == 0
+
+
+def test_migrate_counts_statuses_of_first_version(db, registry):
+    db.set(REGISTRY_VERSION, 1)
+    db.hset("running", "status", 1)
+    db.hset("retired", "last_app_refresh", 30)
+    db.hset("retired", "status", 4)
+    registry.add("running", 10)
+    registry.add("retired", 20)
+
+    assert registry.migrate() == 2
+    assert registry.status_counts() == {1: 1, 4: 1}
+    assert db.zcard(REFRESHED) == 0
+    assert registry.migrate() == 0
+
+
+def test_migrate_rejects_corrupt_database(db, registry):
+    db.set("not_a_submission", "value")
+    with pytest.raises(TypeError):
+        registry.migrate()
+
+
+def test_stale_and_unrefreshed(registry):
+    registry.add("building", 10)
+    registry.add("running", 10)
+    registry.add("fresh", 10)
+    registry.refresh("running", 20)
+    registry.refresh("fresh", 100)
+
+    assert registry.stale(50) == ["running"]
+    assert registry.unrefreshed() == ["building"]
+
+
+def test_prune_drops_expired_submissions(db, registry):
+    db.hset("running", "submit_time", 10)
+    registry.add("running", 10)
+    registry.add("expired", 10)
+
+    assert registry.prune(["running", "expired"]) == ["running"]
+    assert db.zrange(SUBMISSIONS, 0, -1) == ["running"]
+
+
+def test_remove_expired_drops_ended_submissions(db, registry):
+    for thread_id in ("expired", "expiring", "persisted", "later"):
+        db.hset(thread_id, "submit_time", 10)
+        registry.add(thread_id, 10)
+    db.expire("expiring", 60)
+    db.expire("later", 60)
+    db.delete("expired")
+    for thread_id in ("expired", "expiring", "persisted"):
+        registry.expire(thread_id, 20)
+    registry.expire("later", 100)
+
+    assert registry.remove_expired(50) == ["expired"]
+    assert db.zrange(SUBMISSIONS, 0, -1) == ["expiring", "later", "persisted"]
+    assert db.zrange(EXPIRING, 0, -1) == ["expiring", "later"]
+
+
+def test_status_counts_follow_transitions(registry):
+    registry.add("first", 10)
+    registry.add("second", 10)
+    registry.set_status("first", 0)
+    registry.set_status("second", 0)
+    registry.set_status("first", 1)
+    registry.set_status("first", 1)
+    assert registry.status_counts() == {0: 1, 1: 1}
+
+    registry.remove("first", "unknown")
+    assert registry.status_counts() == {0: 1, 1: 0}
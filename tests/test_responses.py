@@ -1,18 +1,14 @@
 import base64
-import pytest
 import json
 import io
+import threading
+import time
 
 from werkzeug.datastructures import FileStorage
 
-from micado_eec.micado import app
-
-
-@pytest.fixture
-def client():
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        yield client
+from micado_eec import micado
+from micado_eec.handle_micado import render_details, status_channel
+from micado_eec.micado import r
 
 
 def b64_yaml():
@@ -70,3 +66,123 @@ def test_get_ports_parameters(client):
     assert len(rv.json["parameters"]) == 1
     assert rv.json["parameters"][0]["key"] == "test"
     assert rv.json["parameters"][0]["description"] == "test adt input"
+
+
+def test_get_submission(client, submission_id):
+    rv = client.get(f"micado_eec/submissions/{submission_id}")
+    assert rv.json == {"status": "1", "details": "ZGV0YWlscw==", "onlyStatus": "True"}
+
+
+def test_get_submission_renders_details(client, submission_id):
+    r.hmset(submission_id, {"status_detail": "running", "login_info": "admin"})
+    rv = client.get(f"micado_eec/submissions/{submission_id}")
+    assert rv.json["details"] == render_details("running", "admin")
+    assert "running" in base64.b64decode(rv.json["details"]).decode()
+
+
+def test_get_missing_submission(client):
+    rv = client.get("micado_eec/submissions/missing")
+    assert rv.status_code == 404
+    rv = client.get("micado_eec/submissions/missing/usage_info")
+    assert rv.status_code == 404
+
+
+def test_get_usage_info(client, submission_id):
+    rv = client.get(f"micado_eec/submissions/{submission_id}/usage_info")
+    assert rv.json["runtime_seconds"] > 0
+
+
+def test_get_submissions_status(client, submission_id):
+    body = {"ids": [submission_id, "missing"]}
+    rv = client.post("micado_eec/submissions/status", json=body)
+    assert rv.json["submissions"] == {
+        submission_id: {"status": "1", "details": "ZGV0YWlscw==", "onlyStatus": "True"},
+        "missing": None,
+    }
+
+
+def test_get_submissions_status_fields(client, submission_id):
+    rv = client.get(
+        f"micado_eec/submissions/status?ids={submission_id}&fields=status,onlyStatus"
+    )
+    assert rv.json["submissions"][submission_id] == {
+        "status": "1",
+        "onlyStatus": "True",
+    }
+
+
+def test_get_submissions_status_bad_request(client, submission_id):
+    rv = client.post("micado_eec/submissions/status", json={})
+    assert rv.status_code == 400
+    body = {"ids": [submission_id], "fields": ["secret"]}
+    rv = client.post("micado_eec/submissions/status", json=body)
+    assert rv.status_code == 400
+    for body in ([submission_id], {"ids": [1, 2]}, {"ids": [submission_id], "fields": 1}):
+        rv = client.post("micado_eec/submissions/status", json=body)
+        assert rv.status_code == 400
+
+
+def test_get_submission_not_modified(client, submission_id):
+    rv = client.get(f"micado_eec/submissions/{submission_id}")
+    etag = rv.headers["ETag"]
+    rv = client.get(
+        f"micado_eec/submissions/{submission_id}",
+        headers={"If-None-Match": etag},
+    )
+    assert rv.status_code == 304
+    assert rv.headers["ETag"] == etag
+    assert not rv.data
+
+
+def test_get_submission_since_without_wait(client, submission_id):
+    rv = client.get(f"micado_eec/submissions/{submission_id}")
+    version = rv.headers["ETag"].strip('"')
+    rv = client.get(f"micado_eec/submissions/{submission_id}?since={version}")
+    assert rv.status_code == 200
+    assert rv.json["status"] is not None
+
+
+def test_get_submission_long_poll(client, submission_id):
+    def change_status():
+        time.sleep(0.2)
+        r.hincrby(submission_id, "version")
+        r.publish(status_channel(submission_id), 1)
+
+    threading.Thread(target=change_status).start()
+    start = time.monotonic()
+    rv = client.get(f"micado_eec/submissions/{submission_id}?wait=5&since=0")
+    assert rv.status_code == 200
+    assert rv.headers["ETag"] == '"1"'
+    assert time.monotonic() - start < 5
+
+
+def test_get_submission_long_poll_times_out(client, submission_id):
+    rv = client.get(f"micado_eec/submissions/{submission_id}?wait=0.2&since=0")
+    assert rv.status_code == 304
+
+
+def test_long_polls_are_capped(client, submission_id, monkeypatch):
+    long_polls = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(micado, "_long_polls", long_polls)
+    url = f"micado_eec/submissions/{submission_id}?wait=5&since=0"
+
+    long_polls.acquire()
+    start = time.monotonic()
+    assert client.get(url).status_code == 304
+    assert time.monotonic() - start < 1
+    long_polls.release()
+
+    start = time.monotonic()
+    assert client.get(url.replace("wait=5", "wait=0.2")).status_code == 304
+    assert time.monotonic() - start >= 0.2
+
+
+def test_get_ports_is_cached(client):
+    body = {
+        "artefact_data": {"downloadUrl": "adt.yaml", "downloadUrl_content": b64_yaml()}
+    }
+    client.get("micado_eec/get_ports", json=body)
+    hits = client.get("micado_eec/cache_info").json["ports"]["hits"]
+    rv = client.get("micado_eec/get_ports", json=body)
+    assert rv.json["parameters"][0]["key"] == "test"
+    assert client.get("micado_eec/cache_info").json["ports"]["hits"] == hits + 1
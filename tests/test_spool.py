@@ -0,0 +1,172 @@
+import base64
+import io
+import json
+import os
+import uuid
+import zipfile
+
+import pytest
+
+from micado_eec import micado, spool
+from micado_eec.handle_micado import r, STATUS_INIT, STATUS_RUNNING
+from micado_eec.lease import lease_key
+from micado_eec.micado import _write_csar
+
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(spool, "SPOOL_DIR", str(tmp_path / "spool"))
+    return tmp_path / "spool"
+
+
+def test_same_submission_gets_separate_directories():
+    first, second = spool.create("id/../1"), spool.create("id/../1")
+    assert first != second
+    assert os.path.dirname(first) == spool.SPOOL_DIR
+    spool.remove("id/../1")
+    assert not os.path.exists(first) and not os.path.exists(second)
+
+
+def test_remove_keeps_submissions_sharing_a_prefix():
+    kept = spool.create("job.v2")
+    spool.create("job")
+    spool.remove("job")
+    assert [entry.path for entry in spool.entries()] == [kept]
+    assert spool.entries()[0].thread_id == "job.v2"
+
+
+def test_usage_counts_spooled_files():
+    path = spool.create("submission")
+    with open(os.path.join(path, "input.txt"), "wb") as file:
+        file.write(b"x" * 100)
+    assert spool.usage() == {"submissions": 1, "files": 1, "bytes": 100}
+
+
+def test_csar_is_handed_over_as_open_file(new_handler):
+    path = _write_csar(base64.b64encode(b"PK csar").decode(), spool.create("csar"))
+    handler = new_handler(
+        artefact_data={"downloadUrl": "artefact.csar"},
+        file_paths={"deployment_adt": path},
+    )
+    with handler._get_adt() as csar:
+        assert csar.read() == b"PK csar"
+
+
+class Launched:
+    """Stands in for HandleMicado, recording the spooled files it gets"""
+
+    def __init__(self, thread_id, name, artefact_data, inouts, file_paths, *ports):
+        self.artefact_data = artefact_data
+        self.ports = ports
+        self.files = {}
+        for ref, path in file_paths.items():
+            with open(path, "rb") as file:
+                self.files[ref] = file.read()
+        Launched.last = self
+
+    def start(self):
+        return True
+
+
+def upload(client, **files):
+    data = {name: (io.BytesIO(content), name) for name, content in files.items()}
+    return client.post(
+        "/micado_eec/submissions", data=data, content_type="multipart/form-data"
+    )
+
+
+@pytest.fixture(autouse=True)
+def launched(monkeypatch):
+    monkeypatch.setattr(micado, "HandleMicado", Launched)
+
+
+def artefact(thread_id, url="artefact.csar", **fields):
+    return json.dumps({"emgwamId": thread_id, "downloadUrl": url, **fields}).encode()
+
+
+def test_uploads_are_moved_into_submission_spool(client, monkeypatch):
+    monkeypatch.setattr(micado, "_get_artefact_ports", lambda artefact, csar_path: ({}, {}, {}))
+    response = upload(
+        client,
+        artefact_data=artefact(
+            "upload", downloadUrl_content=base64.b64encode(b"PK csar").decode()
+        ),
+        inouts=b"{}",
+        extra=b"x" * 100,
+    )
+
+    assert response.status_code == 200
+    assert Launched.last.files == {"extra": b"x" * 100, "deployment_adt": b"PK csar"}
+    assert "downloadUrl_content" not in Launched.last.artefact_data
+    [entry] = spool.entries()
+    assert entry.thread_id == "upload"
+    assert sorted(os.listdir(entry.path)) == ["deployment.csar", "extra"]
+
+
+def test_csar_is_decoded_once(client, monkeypatch):
+    def decode_again(b64_csar):
+        raise AssertionError("CSAR decoded twice")
+
+    monkeypatch.setattr(micado, "get_csar_inputs", decode_again)
+    archive = io.BytesIO()
+    input_name = f"input_{uuid.uuid4().hex}"
+    with zipfile.ZipFile(archive, "w") as csar:
+        csar.writestr("adt.yaml", f"topology_template: {{inputs: {{{input_name}: {{}}}}}}")
+    b64_csar = base64.b64encode(archive.getvalue()).decode()
+
+    response = upload(
+        client,
+        artefact_data=artefact("upload", downloadUrl_content=b64_csar),
+        inouts=b"{}",
+    )
+
+    assert response.status_code == 200
+    assert [param["key"] for param in Launched.last.ports[2]] == [input_name]
+    assert Launched.last.files["deployment_adt"] == archive.getvalue()
+
+
+def test_unclaimed_upload_is_removed(client):
+    response = upload(client, artefact_data=artefact("upload"))
+    assert response.status_code == 400
+    assert spool.entries() == []
+
+
+def test_upload_too_large(client, monkeypatch):
+    monkeypatch.setitem(micado.app.config, "MAX_CONTENT_LENGTH", 1000)
+    response = upload(client, artefact_data=artefact("upload"), extra=b"x" * 2000)
+    assert response.status_code == 413
+    assert spool.entries() == []
+
+
+def test_reclaim_spool_keeps_uploads_still_being_written():
+    incoming = spool.create_incoming()
+    with spool.create_part(incoming) as part:
+        old = os.stat(incoming).st_mtime - 600
+        os.utime(incoming, (old, old))
+        part.write(b"x")
+        part.flush()
+        micado._reclaim_spool(min_age=60)
+        assert os.path.exists(incoming)
+
+        os.utime(part.name, (old, old))
+        micado._reclaim_spool(min_age=60)
+        assert not os.path.exists(incoming)
+
+
+def test_reclaim_spool_keeps_submissions_being_built():
+    thread_ids = ["test-building", "test-running", "test-unowned"]
+    paths = [spool.create(thread_id) for thread_id in thread_ids]
+    incoming = spool.create_incoming()
+    r.hset("test-building", "status", STATUS_INIT)
+    r.hset("test-running", "status", STATUS_RUNNING)
+    r.hset("test-unowned", "status", STATUS_INIT)
+    r.set(lease_key("test-building"), "owner")
+    try:
+        micado._reclaim_spool(min_age=60)
+        assert len(spool.entries()) == 4
+
+        micado._reclaim_spool(min_age=0)
+        assert [entry.path for entry in spool.entries()] == [paths[0]]
+        assert not os.path.exists(incoming)
+    finally:
+        r.delete(*thread_ids, lease_key("test-building"))
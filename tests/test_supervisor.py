@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from micado_eec.handle_micado import r, registry, ABORT_CHANNEL
+from micado_eec.supervisor import Supervisor
+
+
+class Handler:
+    def __init__(self, thread_id):
+        self.threadID = thread_id
+        self.aborted = threading.Event()
+
+    def abort(self):
+        self.aborted.set()
+
+
+@pytest.fixture
+def supervisor():
+    return Supervisor(r, registry, ABORT_CHANNEL, interval=60, max_workers=2)
+
+
+@pytest.fixture
+def stub_handler():
+    thread_id = f"test-{uuid.uuid4()}"
+    r.hset(thread_id, "submit_time", 0)
+    yield Handler(thread_id)
+    r.delete(thread_id)
+
+
+def test_watch_refreshes_submission(supervisor, stub_handler):
+    supervisor.watch(stub_handler)
+    assert r.hexists(stub_handler.threadID, "last_app_refresh")
+    assert supervisor.watched == [stub_handler.threadID]
+
+
+def test_heartbeat_schedules_flagged_abort(supervisor, stub_handler):
+    supervisor.watch(stub_handler)
+    r.hset(stub_handler.threadID, "abort", True)
+    supervisor.heartbeat()
+    assert stub_handler.aborted.wait(1)
+    assert supervisor.watched == []
+
+
+def test_published_abort_is_delivered(supervisor, stub_handler):
+    supervisor.watch(stub_handler)
+    assert supervisor.listener.subscribed.wait(1)
+    r.publish(ABORT_CHANNEL, stub_handler.threadID)
+    assert stub_handler.aborted.wait(1)
+
+
+def test_jobs_respect_concurrency_cap(supervisor):
+    running, peak = [], []
+    lock = threading.Lock()
+
+    def job():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    futures = [supervisor.submit(job) for _ in range(6)]
+    [future.result() for future in futures]
+    assert max(peak) == 2
+
+
+def test_aborts_do_not_queue_behind_builds(supervisor, stub_handler):
+    release = threading.Event()
+    builds = [supervisor.submit(release.wait) for _ in range(4)]
+    try:
+        supervisor.watch(stub_handler)
+        supervisor.abort(stub_handler.threadID)
+        assert stub_handler.aborted.wait(1)
+    finally:
+        release.set()
+    [future.result() for future in builds]
+
+
+def test_lease_has_single_owner(supervisor, stub_handler):
+    other = Supervisor(r, registry, ABORT_CHANNEL, interval=60)
+    assert supervisor.acquire(stub_handler.threadID)
+    assert not other.acquire(stub_handler.threadID)
+    assert supervisor.leases.owner_of(stub_handler.threadID) == supervisor.leases.owner
+    supervisor.release(stub_handler.threadID)
+    assert other.acquire(stub_handler.threadID)
+    other.release(stub_handler.threadID)
+
+
+def test_lost_lease_stops_watching(supervisor, stub_handler):
+    supervisor.acquire(stub_handler.threadID)
+    supervisor.watch(stub_handler)
+    r.delete(f"lease:{stub_handler.threadID}")
+    supervisor.renew()
+    assert supervisor.owned == []
+    assert supervisor.watched == []
@@ -0,0 +1,166 @@
+import base64
+import io
+import os
+import pathlib
+import zipfile
+
+import pytest
+import ruamel.yaml as yaml
+from Crypto.Cipher import PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+from micado_eec import utils, yaml_loader
+from micado_eec.utils import (
+    b64decode_to_spool,
+    decrypt_many,
+    get_csar_inputs,
+    retry,
+)
+
+
+def adt_with_input(name):
+    return f"""\
+tosca_definitions_version: tosca_simple_yaml_1_2
+topology_template:
+  inputs:
+    {name}:
+      description: {name} input
+""".encode()
+
+
+def b64_csar(files):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    return base64.b64encode(archive.getvalue()).decode("utf-8")
+
+
+SCALARS = """\
+bools: [true, False, yes, no, on, off]
+ints: [42, -17, 017, 0o17, 0x1F, 0b101, 1_000]
+floats: [1.5, 1e3, -.5, .inf, 6.8523015e+5]
+strings: [1:20, 0o, "yes", '017']
+nulls: [~, null, ]
+times: [2001-12-14, 2001-12-14t21:59:43.10-05:00]
+merged:
+  - &base {x: 1}
+  - <<: *base
+    x: 2
+"""
+
+libyaml = pytest.mark.skipif(
+    yaml_loader.PARSER != "libyaml", reason="libyaml is not available"
+)
+
+
+@libyaml
+@pytest.mark.parametrize(
+    "document",
+    [SCALARS, pathlib.Path(__file__).with_name("scripts").joinpath("adt.yaml")],
+)
+def test_libyaml_loads_as_ruamel(document):
+    if isinstance(document, pathlib.Path):
+        document = document.read_text()
+    assert yaml_loader.load(document) == yaml.safe_load(document)
+
+
+@libyaml
+def test_version_directive_is_followed():
+    document = "%YAML 1.1\n---\na: yes\n"
+    assert yaml_loader.load(document) == yaml.safe_load(document) == {"a": True}
+    assert yaml_loader.load(io.BytesIO(document.encode())) == {"a": True}
+
+
+@libyaml
+@pytest.mark.parametrize("document", ["a: [", "a: 1\na: 2\n"])
+def test_libyaml_raises_ruamel_errors(document):
+    with pytest.raises(yaml.YAMLError):
+        yaml_loader.load(document)
+
+
+def test_csar_inputs_from_entry_definitions():
+    csar = b64_csar(
+        {
+            "TOSCA-Metadata/TOSCA.meta": b"TOSCA-Meta-File-Version: 1.0\n"
+            b"Entry-Definitions: definitions/main.yaml\n",
+            "definitions/main.yaml": adt_with_input("entry"),
+            "definitions/types.yaml": adt_with_input("imported"),
+        }
+    )
+    assert [param["key"] for param in get_csar_inputs(csar)] == ["entry"]
+
+
+def test_csar_inputs_without_metadata_scans_templates():
+    csar = b64_csar(
+        {
+            "main.yaml": adt_with_input("first"),
+            "other.yaml": adt_with_input("second"),
+            "__MACOSX/main.yaml": adt_with_input("ignored"),
+        }
+    )
+    assert [param["key"] for param in get_csar_inputs(csar)] == ["first", "second"]
+
+
+@pytest.mark.parametrize("chunk_size", [3, 4, 7, 1024])
+def test_b64decode_to_spool_in_chunks(chunk_size):
+    data = os.urandom(1000)
+    encoded = base64.encodebytes(data).decode("utf-8")  # with newlines
+    with b64decode_to_spool(encoded, chunk_size=chunk_size) as spool:
+        assert spool.read() == data
+
+
+def write_key(path, key):
+    path.write_bytes(base64.b64encode(key.export_key()))
+
+
+def encrypt(key, plaintext):
+    ciphertext = PKCS1_v1_5.new(key.publickey()).encrypt(plaintext.encode())
+    return base64.b64encode(ciphertext).decode()
+
+
+@pytest.fixture
+def private_key(tmp_path, monkeypatch):
+    key = RSA.generate(1024)
+    path = tmp_path / "eec.pem"
+    write_key(path, key)
+    monkeypatch.setattr(utils, "EEC_PRIV_KEY", str(path))
+    return key
+
+
+def test_decrypt_many(private_key):
+    ciphertexts = [encrypt(private_key, secret) for secret in ("one", "two")]
+    assert decrypt_many(ciphertexts) == ["one", "two"]
+    assert decrypt_many([]) == []
+
+
+def test_private_key_is_reloaded_when_modified(private_key):
+    assert utils.get_cipher() is utils.get_cipher()
+
+    new_key = RSA.generate(1024)
+    write_key(pathlib.Path(utils.EEC_PRIV_KEY), new_key)
+    os.utime(utils.EEC_PRIV_KEY, ns=(0, 0))
+    assert decrypt_many([encrypt(new_key, "rotated")]) == ["rotated"]
+
+
+def test_retry_backs_off_exponentially():
+    delays, calls = [], []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError()
+        return "done"
+
+    assert retry(flaky, attempts=3, backoff=2, sleep=delays.append) == "done"
+    assert delays == [2, 4]
+
+
+def test_retry_gives_up():
+    def failing():
+        raise ConnectionError()
+
+    delays = []
+    with pytest.raises(ConnectionError):
+        retry(failing, attempts=3, sleep=delays.append)
+    assert delays == [1, 2]